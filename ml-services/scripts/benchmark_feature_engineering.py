@@ -0,0 +1,317 @@
+"""
+Benchmark suite for the feature engineering hot paths
+Times AdvancedFeatureEngineering on synthetic odds histories (10 to 100k ticks),
+bookmaker odds, form / head-to-head lists and fixture lists (1 to 50k events), and
+reports throughput, p50 / p99 latency and peak traced memory per case.
+
+Inputs come from a seeded generator, so runs on the same machine are comparable:
+
+    python scripts/benchmark_feature_engineering.py --save bench/baseline.json
+    python scripts/benchmark_feature_engineering.py --compare bench/baseline.json
+
+A full run takes a few minutes (the 50k fixture list dominates); --quick caps the
+largest inputs. --compare exits with status 1 when a case is slower (p50) or uses
+more peak memory than the baseline by more than --threshold.
+"""
+import sys
+import os
+import argparse
+import json
+import math
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.advanced_feature_engineering import AdvancedFeatureEngineering
+
+TICK_SIZES = (10, 100, 1000, 10000, 100000)
+BOOKMAKER_SIZES = (3, 10, 50)
+RESULT_SIZES = (5, 10, 50)
+FIXTURE_SIZES = (1, 100, 1000, 10000, 50000)
+
+# --quick caps the largest inputs so a run takes seconds
+QUICK_MAX_TICKS = 10000
+QUICK_MAX_FIXTURES = 1000
+
+PREDICTION_TIME = datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc)
+TEAMS = [f'Team {i}' for i in range(40)]
+
+class SyntheticData:
+    """
+    Seeded generator of feature engineering inputs
+    """
+    
+    def __init__(self, seed: int = 42):
+        self.rng = np.random.default_rng(seed)
+        self.random = random.Random(seed)
+    
+    def odds_history(self, n_ticks: int) -> List[float]:
+        """Random walk of decimal odds (log scale), kept above 1.01"""
+        start = self.random.uniform(1.3, 6.0)
+        steps = self.rng.normal(0.0, 0.01, n_ticks)
+        return np.maximum(start * np.exp(np.cumsum(steps)), 1.01).tolist()
+    
+    def bookmaker_odds(self, n_bookmakers: int) -> List[float]:
+        """Odds for one selection across bookmakers, scattered around a fair price"""
+        fair = self.random.uniform(1.3, 6.0)
+        return np.maximum(fair * (1.0 + self.rng.normal(0.0, 0.03, n_bookmakers)), 1.01).tolist()
+    
+    def results(self, n_results: int, team: Optional[str] = None, opponent: Optional[str] = None) -> List[Dict]:
+        """Finished matches (newest first), involving `team` (and `opponent`) when given"""
+        results = []
+        for _ in range(n_results):
+            home, away = self.random.sample(TEAMS, 2)
+            if team is not None:
+                other = opponent if opponent is not None else away
+                home, away = (team, other) if self.random.random() < 0.5 else (other, team)
+            results.append({
+                'homeTeam': home,
+                'awayTeam': away,
+                'homeScore': int(self.rng.poisson(1.5)),
+                'awayScore': int(self.rng.poisson(1.1)),
+                'is_home': home == team,
+            })
+        return results
+    
+    def fixtures(self, n_events: int, n_ticks: int = 50, n_bookmakers: int = 10, n_results: int = 10) -> List[Dict]:
+        """create_all_features keyword arguments for a fixture list"""
+        samples = []
+        for i in range(n_events):
+            home, away = self.random.sample(TEAMS, 2)
+            start = PREDICTION_TIME + timedelta(minutes=self.random.randint(30, 14 * 24 * 60))
+            samples.append({
+                'event': {
+                    'id': f'event-{i}',
+                    'homeTeam': home,
+                    'awayTeam': away,
+                    'startTime': start.isoformat().replace('+00:00', 'Z'),
+                    'importance': round(self.random.uniform(0.2, 1.0), 2),
+                },
+                'odds_history': self.odds_history(n_ticks),
+                'all_odds': self.bookmaker_odds(n_bookmakers),
+                'team1_form': self.results(n_results, home),
+                'team2_form': self.results(n_results, away),
+                'h2h_history': self.results(max(n_results // 2, 1), home, away),
+                'prediction_time': PREDICTION_TIME,
+            })
+        return samples
+
+def _percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    index = min(max(int(math.ceil(q / 100.0 * len(sorted_values))) - 1, 0), len(sorted_values) - 1)
+    return sorted_values[index]
+
+class FeatureEngineeringBenchmark:
+    """
+    Runs the benchmark cases and collects one result dict per case
+    """
+    
+    def __init__(self, seed: int = 42, min_time: float = 0.5, max_calls: int = 2000, quick: bool = False):
+        self.seed = seed
+        self.min_time = min_time
+        self.max_calls = max_calls
+        self.quick = quick
+        self.feature_engineer = AdvancedFeatureEngineering()
+    
+    def cases(self) -> List[Tuple[str, int, Callable[[SyntheticData], Tuple[Callable, List]]]]:
+        """(name, size, setup) per case; setup builds (function, list of argument tuples)"""
+        afe = self.feature_engineer
+        tick_sizes = [n for n in TICK_SIZES if not self.quick or n <= QUICK_MAX_TICKS]
+        fixture_sizes = [n for n in FIXTURE_SIZES if not self.quick or n <= QUICK_MAX_FIXTURES]
+        
+        cases = []
+        for n in tick_sizes:
+            cases.append(('calculate_technical_indicators', n,
+                          lambda data, n=n: (afe.calculate_technical_indicators,
+                                             [(data.odds_history(n),) for _ in range(8)])))
+        for n in BOOKMAKER_SIZES:
+            cases.append(('calculate_market_intelligence', n,
+                          lambda data, n=n: (afe.calculate_market_intelligence,
+                                             [(data.bookmaker_odds(n),) for _ in range(32)])))
+        for n in RESULT_SIZES:
+            cases.append(('calculate_team_form_features', n,
+                          lambda data, n=n: (afe.calculate_team_form_features,
+                                             [(data.results(n, team), team, i % 2 == 0)
+                                              for i, team in enumerate(TEAMS[:32])])))
+        for n in RESULT_SIZES:
+            cases.append(('calculate_head_to_head_features', n,
+                          lambda data, n=n: (afe.calculate_head_to_head_features,
+                                             [(data.results(n, home, away), home, away)
+                                              for home, away in zip(TEAMS[:32], TEAMS[8:40])])))
+        for n in fixture_sizes:
+            cases.append(('create_all_features', n, lambda data, n=n: (self._create_all_features, data.fixtures(n))))
+        return cases
+    
+    def _create_all_features(self, sample: Dict) -> Dict[str, float]:
+        return self.feature_engineer.create_all_features(**sample)
+    
+    def run(self, only: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        results = {}
+        for name, size, setup in self.cases():
+            key = f'{name}[{size}]'
+            if only and only not in key:
+                continue
+            function, arguments = setup(SyntheticData(self.seed))
+            if name == 'create_all_features':
+                results[key] = self._measure_fixtures(function, arguments)
+            else:
+                results[key] = self._measure_calls(function, arguments)
+            print(self._format_row(key, results[key]), flush=True)
+        return results
+    
+    def _measure_calls(self, function: Callable, arguments: List[Tuple]) -> Dict[str, float]:
+        """Repeated calls over a small pool of inputs until min_time or max_calls"""
+        function(*arguments[0])  # Warm up
+        latencies = []
+        started = time.perf_counter()
+        while len(latencies) < 5 or (time.perf_counter() - started < self.min_time and len(latencies) < self.max_calls):
+            args = arguments[len(latencies) % len(arguments)]
+            t0 = time.perf_counter_ns()
+            function(*args)
+            latencies.append(time.perf_counter_ns() - t0)
+        
+        peak = self._peak_memory(lambda: function(*arguments[0]))
+        return self._summary(latencies, sum(latencies) / 1e9, peak)
+    
+    def _measure_fixtures(self, function: Callable, samples: List[Dict]) -> Dict[str, float]:
+        """Whole passes over a fixture list (cold feature cache each pass)"""
+        self.feature_engineer.feature_cache.clear()
+        function(samples[0])  # Warm up
+        
+        def one_pass(latencies: List[int]):
+            self.feature_engineer.feature_cache.clear()
+            for sample in samples:
+                t0 = time.perf_counter_ns()
+                function(sample)
+                latencies.append(time.perf_counter_ns() - t0)
+        
+        latencies: List[int] = []
+        passes = 0
+        started = time.perf_counter()
+        while passes == 0 or (time.perf_counter() - started < self.min_time and len(latencies) < self.max_calls):
+            one_pass(latencies)
+            passes += 1
+        
+        peak = self._peak_memory(lambda: one_pass([]))
+        self.feature_engineer.feature_cache.clear()
+        return self._summary(latencies, sum(latencies) / 1e9, peak)
+    
+    @staticmethod
+    def _peak_memory(function: Callable) -> int:
+        """Peak bytes allocated (tracemalloc) while running `function` once"""
+        tracemalloc.start()
+        try:
+            function()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    
+    @staticmethod
+    def _summary(latencies: List[int], total_seconds: float, peak_bytes: int) -> Dict[str, float]:
+        ordered = sorted(latencies)
+        return {
+            'calls': len(ordered),
+            'throughput_per_s': len(ordered) / total_seconds if total_seconds > 0 else float('inf'),
+            'p50_us': _percentile(ordered, 50) / 1e3,
+            'p99_us': _percentile(ordered, 99) / 1e3,
+            'mean_us': total_seconds * 1e6 / len(ordered),
+            'peak_kib': peak_bytes / 1024.0,
+        }
+    
+    @staticmethod
+    def _format_row(key: str, result: Dict[str, float]) -> str:
+        return (f"{key:<42} {result['throughput_per_s']:>12,.0f}/s  p50 {result['p50_us']:>10.1f}us"
+                f"  p99 {result['p99_us']:>10.1f}us  peak {result['peak_kib']:>10.1f}KiB")
+
+def environment() -> Dict[str, str]:
+    """Machine and code version the numbers belong to"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ''
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+    }
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict, threshold: float) -> List[str]:
+    """Print current / baseline ratios and return the keys that regressed"""
+    base_results = baseline.get('results', {})
+    base_env = baseline.get('environment', {})
+    print(f"\nCompared with baseline from {base_env.get('timestamp', '?')} (commit {base_env.get('commit') or '?'})")
+    if base_env.get('platform') != platform.platform():
+        print(f"Note: baseline was recorded on {base_env.get('platform')!r}; timings may not be comparable")
+    
+    regressions = []
+    for key, result in results.items():
+        base = base_results.get(key)
+        if base is None:
+            print(f"{key:<42} (not in baseline)")
+            continue
+        p50_ratio = result['p50_us'] / base['p50_us'] if base['p50_us'] else float('inf')
+        p99_ratio = result['p99_us'] / base['p99_us'] if base['p99_us'] else float('inf')
+        memory_ratio = result['peak_kib'] / base['peak_kib'] if base['peak_kib'] else 1.0
+        regressed = p50_ratio > 1.0 + threshold or memory_ratio > 1.0 + threshold
+        if regressed:
+            regressions.append(key)
+        print(f"{key:<42} p50 x{p50_ratio:5.2f}  p99 x{p99_ratio:5.2f}  peak x{memory_ratio:5.2f}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the feature engineering hot paths")
+    parser.add_argument("--save", help="Write results to this JSON baseline")
+    parser.add_argument("--compare", help="Compare results with this JSON baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Allowed slowdown / memory growth before --compare reports a regression (default: 0.10)"
+    )
+    parser.add_argument("--only", help="Only run cases whose name contains this string")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"Cap inputs at {QUICK_MAX_TICKS} ticks and {QUICK_MAX_FIXTURES} fixtures")
+    parser.add_argument("--seed", type=int, default=42, help="Synthetic data seed (default: 42)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds to spend per case (default: 0.5)")
+    
+    args = parser.parse_args()
+    
+    benchmark = FeatureEngineeringBenchmark(seed=args.seed, min_time=args.min_time, quick=args.quick)
+    results = benchmark.run(only=args.only)
+    
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+    
+    if args.save:
+        directory = os.path.dirname(os.path.abspath(args.save))
+        os.makedirs(directory, exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump({
+                'environment': environment(),
+                'settings': {'seed': args.seed, 'min_time': args.min_time, 'quick': args.quick},
+                'results': results,
+            }, f, indent=2)
+        print(f"\nSaved {len(results)} results to {args.save}")
+    
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Micro-benchmark for UniversalFeatureExtractor and /api/universal/predict
+Compares the current extractor (history parsed once into an array, closed-form
+trend slope) with the previous implementation, which walked the history dicts
+once per feature and fitted the slope with np.polyfit. Both run inside the same
+process and against the same seeded requests:
+
+    python scripts/benchmark_universal_extractor.py
+    python scripts/benchmark_universal_extractor.py --history 10 100 1000 --requests 2000
+"""
+import sys
+import os
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from services.universal_predictor import UniversalFeatureExtractor, predictor, router
+
+class LegacyFeatureExtractor(UniversalFeatureExtractor):
+    """
+    The extractor before history values were parsed once (reference for timings)
+    """
+    
+    def extract(self, data: Dict, historical: Optional[List[Dict]] = None) -> np.array:
+        features = [
+            self._legacy_trend(historical),
+            self._legacy_volatility(historical),
+            self._legacy_momentum(historical),
+            self._calculate_consensus(data),
+            self._calculate_volume(data),
+        ]
+        features.extend(self._extract_temporal_features(data))
+        features.extend(self._legacy_statistical_features(historical))
+        return np.array(features)
+    
+    def _legacy_trend(self, historical: Optional[List[Dict]]) -> float:
+        if not historical or len(historical) < 2:
+            return 0.0
+        values = [h.get('value', h.get('probability', 0.5)) for h in historical[-10:]]
+        slope = np.polyfit(np.arange(len(values)), values, 1)[0]
+        return np.tanh(slope * 10)
+    
+    def _legacy_volatility(self, historical: Optional[List[Dict]]) -> float:
+        if not historical or len(historical) < 2:
+            return 0.5
+        values = [h.get('value', h.get('probability', 0.5)) for h in historical[-20:]]
+        return min(1.0, np.std(values) * 2)
+    
+    def _legacy_momentum(self, historical: Optional[List[Dict]]) -> float:
+        if not historical or len(historical) < 3:
+            return 0.0
+        recent = [h.get('value', h.get('probability', 0.5)) for h in historical[-5:]]
+        older = [h.get('value', h.get('probability', 0.5)) for h in historical[-10:-5]]
+        if len(recent) == 0 or len(older) == 0:
+            return 0.0
+        return np.clip((np.mean(recent) - np.mean(older)) * 2, -1, 1)
+    
+    def _legacy_statistical_features(self, historical: Optional[List[Dict]]) -> List[float]:
+        if not historical or len(historical) < 5:
+            return [0.5, 0.5, 0.5]
+        values = [h.get('value', h.get('probability', 0.5)) for h in historical[-20:]]
+        mean = np.mean(values)
+        median = np.median(values)
+        skew = np.tanh(np.mean((values - mean) ** 3) / (np.std(values) ** 3 + 1e-8))
+        return [mean, median, skew]
+
+def make_request(rng: random.Random, n_history: int, index: int) -> Dict:
+    """Seeded /api/universal/predict body with `n_history` points"""
+    value = rng.uniform(0.2, 0.8)
+    history = []
+    for _ in range(n_history):
+        value = min(0.99, max(0.01, value + rng.gauss(0.0, 0.02)))
+        history.append({'value': value})
+    return {
+        'domain': 'sports',
+        'eventId': f'event-{index}',
+        'features': {
+            'timestamp': '2024-06-01T12:00:00',
+            'volume': rng.random(),
+            'sources': [{'value': rng.uniform(0.3, 0.7)} for _ in range(4)],
+        },
+        'historicalData': history,
+    }
+
+def time_per_call(function: Callable[[Dict], object], requests: List[Dict]) -> float:
+    """Median microseconds per call over the requests (after one warm-up call)"""
+    function(requests[0])
+    timings = []
+    for request in requests:
+        t0 = time.perf_counter_ns()
+        function(request)
+        timings.append(time.perf_counter_ns() - t0)
+    return float(np.median(timings)) / 1e3
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark universal feature extraction per request")
+    parser.add_argument("--history", type=int, nargs="+", default=[10, 100, 1000],
+                        help="History lengths to benchmark (default: 10 100 1000)")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per case (default: 1000)")
+    parser.add_argument("--seed", type=int, default=42, help="Request generator seed (default: 42)")
+    
+    args = parser.parse_args()
+    
+    app = FastAPI()
+    app.include_router(router, prefix="/api/universal")
+    client = TestClient(app)
+    current = predictor.feature_extractor
+    legacy = LegacyFeatureExtractor()
+    
+    def extract_with(extractor: UniversalFeatureExtractor) -> Callable[[Dict], object]:
+        return lambda request: extractor.extract(request['features'], request['historicalData'])
+    
+    def post(request: Dict):
+        response = client.post("/api/universal/predict", json=request)
+        response.raise_for_status()
+    
+    print(f"{'case':<28} {'legacy us':>12} {'current us':>12} {'speedup':>9}")
+    for n_history in args.history:
+        rng = random.Random(args.seed)
+        requests = [make_request(rng, n_history, i) for i in range(args.requests)]
+        
+        mismatch = max(float(np.abs(current.extract(r['features'], r['historicalData'])
+                                    - legacy.extract(r['features'], r['historicalData'])).max()) for r in requests)
+        if mismatch > 1e-9:
+            print(f"Warning: extractors differ by {mismatch:.3g} on history length {n_history}")
+        
+        legacy_extract = time_per_call(extract_with(legacy), requests)
+        current_extract = time_per_call(extract_with(current), requests)
+        print(f"{f'extract [{n_history}]':<28} {legacy_extract:>12.1f} {current_extract:>12.1f}"
+              f" {legacy_extract / current_extract:>8.2f}x")
+        
+        predictor.feature_extractor = legacy
+        try:
+            legacy_post = time_per_call(post, requests)
+        finally:
+            predictor.feature_extractor = current
+        current_post = time_per_call(post, requests)
+        print(f"{f'POST /predict [{n_history}]':<28} {legacy_post:>12.1f} {current_post:>12.1f}"
+              f" {legacy_post / current_post:>8.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Regression check: EventStream features against UniversalFeatureExtractor.extract()
+Streams seeded histories at probability and price scale (large offsets are where
+moments from raw running sums lose their precision) and compares
+extract_from_stream with extract() on the same float32 history after every point:
+
+    python scripts/check_universal_stream.py
+    python scripts/check_universal_stream.py --points 200 --tolerance 1e-6
+"""
+import sys
+import os
+import argparse
+from typing import Callable, Dict
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.universal_predictor import UniversalFeatureExtractor
+from services.universal_stream import EventStream
+
+# name -> values generator (seeded Generator, number of points)
+CASES: Dict[str, Callable[[np.random.Generator, int], np.ndarray]] = {
+    'probability': lambda rng, n: np.clip(0.5 + np.cumsum(rng.normal(0.0, 0.02, n)), 0.01, 0.99),
+    'price 1000 + U(0, 0.05)': lambda rng, n: 1000.0 + rng.uniform(0.0, 0.05, n),
+    'price 30000 + U(0, 1)': lambda rng, n: 30000.0 + rng.uniform(0.0, 1.0, n),
+    'random walk from 65000': lambda rng, n: 65000.0 + np.cumsum(rng.normal(0.0, 25.0, n)),
+}
+
+def max_mismatch(extractor: UniversalFeatureExtractor, values: np.ndarray) -> float:
+    """Largest feature difference between the stream and extract() over every prefix"""
+    data = {'timestamp': '2024-06-01T12:00:00', 'volume': 0.5}
+    values = values.astype(np.float32).astype(np.float64)  # The stream stores float32
+    stream = EventStream()
+    worst = 0.0
+    for i, value in enumerate(values):
+        stream.append(value)
+        history = [{'value': v} for v in values[:i + 1]]
+        expected = extractor.extract(data, history)
+        streamed = extractor.extract_from_stream(data, stream)
+        worst = max(worst, float(np.abs(streamed - expected).max()))
+    return worst
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare streamed universal features with extract()")
+    parser.add_argument("--points", type=int, default=100, help="Points streamed per case (default: 100)")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="Largest allowed difference (default: 1e-6)")
+    parser.add_argument("--seed", type=int, default=42, help="Value generator seed (default: 42)")
+    
+    args = parser.parse_args()
+    
+    extractor = UniversalFeatureExtractor()
+    failed = False
+    for name, generate in CASES.items():
+        mismatch = max_mismatch(extractor, generate(np.random.default_rng(args.seed), args.points))
+        ok = mismatch <= args.tolerance
+        failed |= not ok
+        print(f"{name:<28} max difference {mismatch:.3g} {'ok' if ok else 'FAIL'}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Adapter Jobs
+Background training jobs for the universal predictor's domain adapters.
+
+/adapt returns a job id straight away; the job then runs in three steps:
+    preparing   universal features and labels are extracted in the API process
+    running     DomainAdapter.train runs in a worker process, reporting progress
+    finishing   the trained adapter is saved and swapped in by the predictor
+
+Each job trains in a new process started from a minimal entry module
+(services/adapter_worker.py), so workers never re-import the API app, its routers
+or the deep learning stack, and the worker exits when its job ends, returning its
+memory to the OS. A worker has a budget: CPU seconds (RLIMIT_CPU), address space
+on top of its start-up footprint (RLIMIT_AS) and BLAS / OpenMP threads
+(threadpoolctl). A job whose worker runs out of budget fails; later jobs are not
+affected.
+
+Budgets and concurrency come from the environment:
+    ADAPTER_JOB_WORKERS       concurrent training jobs (default 1)
+    ADAPTER_JOB_CPU_SECONDS   CPU seconds per job (default 600)
+    ADAPTER_JOB_MEMORY_MB     extra address space per job in MiB (default 2048)
+    ADAPTER_JOB_THREADS       BLAS / OpenMP threads per job (default 1)
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import os
+import pickle
+import signal
+import subprocess
+import sys
+import threading
+import uuid
+
+JOB_STATUSES = ('queued', 'preparing', 'running', 'finishing', 'done', 'failed')
+ACTIVE_STATUSES = ('queued', 'preparing', 'running', 'finishing')
+
+# Workers run `python -m services.adapter_worker` from the directory holding `services`
+WORKER_MODULE = 'services.adapter_worker'
+WORKER_CWD = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class AdapterJob:
+    """
+    State of one adapter training job, as reported by GET /jobs/{job_id}
+    """
+    
+    def __init__(self, domain: str, kind: str = 'train'):
+        self.id = uuid.uuid4().hex
+        self.domain = domain
+        self.kind = kind  # 'train' (/adapt) or 'refit' (after incremental updates)
+        self.status = 'queued'
+        self.progress = 0.0  # Fraction of boosting stages trained
+        self.samples: Optional[int] = None
+        self.version: Optional[int] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+    
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+    
+    def to_dict(self) -> Dict:
+        return {
+            "jobId": self.id,
+            "domain": self.domain,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "trainingSamples": self.samples,
+            "version": self.version,
+            "error": self.error,
+            "createdAt": self.created_at.isoformat(),
+            "startedAt": self.started_at.isoformat() if self.started_at else None,
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+class AdapterJobManager:
+    """
+    Runs adapter training jobs in resource-limited worker processes
+    Thread-safe; dispatcher threads are started with the first job
+    """
+    
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 cpu_seconds: Optional[int] = None,
+                 memory_mb: Optional[int] = None,
+                 threads: Optional[int] = None,
+                 max_jobs: int = 200):
+        self.max_workers = max_workers or int(os.getenv('ADAPTER_JOB_WORKERS', '1'))
+        self.cpu_seconds = cpu_seconds if cpu_seconds is not None else int(os.getenv('ADAPTER_JOB_CPU_SECONDS', '600'))
+        self.memory_mb = memory_mb if memory_mb is not None else int(os.getenv('ADAPTER_JOB_MEMORY_MB', '2048'))
+        self.threads = threads if threads is not None else int(os.getenv('ADAPTER_JOB_THREADS', '1'))
+        self.max_jobs = max_jobs  # Finished jobs beyond this are forgotten, oldest first
+        self.jobs: 'OrderedDict[str, AdapterJob]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._dispatcher: Optional[ThreadPoolExecutor] = None
+        self._processes: Dict[str, subprocess.Popen] = {}  # Running workers by job id
+    
+    def submit(self,
+               domain: str,
+               prepare: Callable[[], Tuple],
+               finish: Callable[[object, int], Optional[int]],
+               options: Optional[Dict] = None,
+               kind: str = 'train') -> AdapterJob:
+        """
+        Queue a job: prepare() returns (features, labels) in the API process, a worker
+        trains DomainAdapter(domain, **options) on them, and finish(adapter, samples)
+        installs it and returns its version
+        """
+        job = AdapterJob(domain, kind)
+        with self._lock:
+            if self._dispatcher is None:
+                # One dispatcher thread per worker; jobs beyond that wait as 'queued'
+                self._dispatcher = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="adapter-job")
+            self.jobs[job.id] = job
+            self._forget_finished()
+            self._dispatcher.submit(self._run, job, prepare, finish, options or {})
+        return job
+    
+    def _run(self, job: AdapterJob, prepare: Callable, finish: Callable, options: Dict):
+        job.started_at = datetime.now()
+        try:
+            job.status = 'preparing'
+            features, labels = prepare()
+            job.samples = len(labels)
+            
+            job.status = 'running'
+            adapter = self._train_in_worker(job, {
+                'domain': job.domain,
+                'options': options,
+                'features': features,
+                'labels': labels,
+            })
+            job.progress = 1.0
+            
+            job.status = 'finishing'
+            job.version = finish(adapter, job.samples)
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            job.status = 'failed'
+        finally:
+            job.finished_at = datetime.now()
+    
+    def _train_in_worker(self, job: AdapterJob, payload: Dict):
+        """Run one job in a new worker process, following its progress; returns the trained adapter"""
+        budget = {
+            'cpu_seconds': self.cpu_seconds or None,
+            'memory_bytes': self.memory_mb * 1024 * 1024 if self.memory_mb else None,
+            'threads': self.threads or None,
+        }
+        process = subprocess.Popen([sys.executable, '-m', WORKER_MODULE],
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=WORKER_CWD)
+        with self._lock:
+            self._processes[job.id] = process
+        try:
+            try:
+                pickle.dump(budget, process.stdin, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(payload, process.stdin, protocol=pickle.HIGHEST_PROTOCOL)
+                process.stdin.close()
+            except BrokenPipeError:
+                pass  # The worker died early; its exit code says why
+            
+            result = None
+            while result is None:
+                try:
+                    kind, value = pickle.load(process.stdout)
+                except EOFError:
+                    break
+                if kind == 'progress':
+                    job.progress = max(job.progress, min(float(value), 1.0))
+                else:
+                    result = (kind, value)
+            process.stdout.close()
+            returncode = process.wait()
+        finally:
+            with self._lock:
+                self._processes.pop(job.id, None)
+        
+        if result is not None and result[0] == 'done':
+            return result[1]
+        if result is not None:
+            raise RuntimeError(result[1])
+        # RLIMIT_CPU sends SIGXCPU at the soft limit and SIGKILL at the hard one
+        if returncode in {-getattr(signal, name) for name in ('SIGXCPU', 'SIGKILL') if hasattr(signal, name)}:
+            raise RuntimeError(f"Training exceeded the CPU budget of {self.cpu_seconds}s")
+        raise RuntimeError(f"Training worker exited with code {returncode}")
+    
+    def _forget_finished(self):
+        """Drop the oldest finished jobs beyond max_jobs (under self._lock)"""
+        excess = len(self.jobs) - self.max_jobs
+        for job_id in [job_id for job_id, job in self.jobs.items() if not job.active][:max(excess, 0)]:
+            del self.jobs[job_id]
+    
+    def get(self, job_id: str) -> Optional[AdapterJob]:
+        return self.jobs.get(job_id)
+    
+    def list_jobs(self, domain: Optional[str] = None) -> List[AdapterJob]:
+        """Jobs (newest first), optionally of one domain"""
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [job for job in reversed(jobs) if domain is None or job.domain == domain]
+    
+    def active_job(self, domain: str, kind: Optional[str] = None) -> Optional[AdapterJob]:
+        """A queued or running job of the domain (and kind), if any"""
+        for job in self.list_jobs(domain):
+            if job.active and (kind is None or job.kind == kind):
+                return job
+        return None
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {
+            'workers': self.max_workers,
+            'cpu_seconds': self.cpu_seconds,
+            'memory_mb': self.memory_mb,
+            'threads': self.threads,
+            **{status: statuses.count(status) for status in JOB_STATUSES},
+        }
+    
+    def shutdown(self, wait: bool = True):
+        """Stop dispatching; without `wait`, running workers are killed"""
+        with self._lock:
+            dispatcher, self._dispatcher = self._dispatcher, None
+            processes = list(self._processes.values())
+        if not wait:
+            for process in processes:
+                process.kill()
+        if dispatcher is not None:
+            dispatcher.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,129 @@
+"""
+Adapter Store
+Versioned, on-disk artifacts for the universal predictor's domain adapters.
+
+Layout:
+    <root>/<domain>/v<version>/
+        adapter.joblib   DomainAdapter (scaler + model), numpy arrays stored uncompressed
+        meta.json        domain, version, training samples, artifact size, created_at
+    <root>/<domain>/LATEST   current version number
+
+A version is written to a staging directory and renamed into place, then LATEST is
+replaced with os.replace, so a reader sees either the previous or the new version.
+Artifacts are loaded with joblib mmap_mode='r': numpy arrays the estimators keep
+(e.g. the scaler's statistics) are memory-mapped from the file rather than copied.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+import json
+import os
+import re
+import shutil
+import tempfile
+import joblib
+
+ADAPTER_FILE = 'adapter.joblib'
+META_FILE = 'meta.json'
+LATEST_FILE = 'LATEST'
+
+# Domains become directory names
+DOMAIN_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+class AdapterStore:
+    """
+    Saves and loads DomainAdapter versions under <root>/<domain>/
+    """
+    
+    def __init__(self, root: Optional[str] = None, keep_versions: int = 5):
+        self.root = root if root is not None else os.path.join(os.path.dirname(__file__), "../../models/universal_adapters")
+        self.keep_versions = keep_versions
+        os.makedirs(self.root, exist_ok=True)
+    
+    def _domain_dir(self, domain: str) -> str:
+        if not DOMAIN_PATTERN.match(domain):
+            raise ValueError(f"Invalid domain name {domain!r}")
+        return os.path.join(self.root, domain)
+    
+    def version_dir(self, domain: str, version: int) -> str:
+        return os.path.join(self._domain_dir(domain), f"v{version}")
+    
+    def domains(self) -> List[str]:
+        """Domains with a saved version"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if DOMAIN_PATTERN.match(name) and os.path.exists(os.path.join(self.root, name, LATEST_FILE))
+        )
+    
+    def latest_version(self, domain: str) -> Optional[int]:
+        try:
+            with open(os.path.join(self._domain_dir(domain), LATEST_FILE)) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+    
+    def metadata(self, domain: str, version: Optional[int] = None) -> Optional[Dict]:
+        version = version if version is not None else self.latest_version(domain)
+        if version is None:
+            return None
+        try:
+            with open(os.path.join(self.version_dir(domain, version), META_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def save(self, domain: str, adapter, training_samples: Optional[int] = None) -> int:
+        """Write `adapter` as the next version of `domain` and make it the latest"""
+        domain_dir = self._domain_dir(domain)
+        os.makedirs(domain_dir, exist_ok=True)
+        version = (self.latest_version(domain) or 0) + 1
+        while os.path.exists(self.version_dir(domain, version)):
+            version += 1
+        
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=domain_dir)
+        try:
+            adapter_path = os.path.join(staging, ADAPTER_FILE)
+            joblib.dump(adapter, adapter_path)
+            with open(os.path.join(staging, META_FILE), 'w') as f:
+                json.dump({
+                    'domain': domain,
+                    'version': version,
+                    'training_samples': training_samples,
+                    'size_bytes': os.path.getsize(adapter_path),
+                    'created_at': datetime.now().isoformat(),
+                }, f)
+            os.rename(staging, self.version_dir(domain, version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        
+        # Point LATEST at the new version atomically
+        fd, pointer = tempfile.mkstemp(prefix='.latest-', dir=domain_dir)
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(version))
+        os.replace(pointer, os.path.join(domain_dir, LATEST_FILE))
+        
+        self._prune(domain, version)
+        return version
+    
+    def load(self, domain: str, version: Optional[int] = None):
+        """Load a version (default: latest) with memory-mapped arrays; None when absent"""
+        version = version if version is not None else self.latest_version(domain)
+        if version is None:
+            return None
+        path = os.path.join(self.version_dir(domain, version), ADAPTER_FILE)
+        if not os.path.exists(path):
+            return None
+        return joblib.load(path, mmap_mode='r')
+    
+    def _prune(self, domain: str, latest: int):
+        """Remove all but the newest keep_versions versions"""
+        domain_dir = self._domain_dir(domain)
+        versions = sorted(
+            int(name[1:]) for name in os.listdir(domain_dir)
+            if name.startswith('v') and name[1:].isdigit()
+        )
+        for version in versions[:-self.keep_versions] if self.keep_versions > 0 else []:
+            if version != latest:
+                shutil.rmtree(self.version_dir(domain, version), ignore_errors=True)
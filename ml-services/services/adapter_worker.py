@@ -0,0 +1,91 @@
+"""
+Adapter Worker
+Entry point of the process that runs one adapter training job for AdapterJobManager:
+
+    python -m services.adapter_worker
+
+It imports only what training needs (numpy, scikit-learn), so a job does not carry
+a copy of the API app and its CPU / memory budget applies to training alone.
+stdin holds two pickles: the budget, then the job (domain, options, features,
+labels). stdout carries pickled messages: ('progress', fraction) while boosting,
+then ('done', adapter) or ('error', message).
+"""
+import os
+import pickle
+import sys
+from typing import Dict, Optional
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False  # Not on Windows; jobs then run without CPU / memory limits
+
+try:
+    from threadpoolctl import threadpool_limits
+    THREADPOOLCTL_AVAILABLE = True
+except ImportError:
+    THREADPOOLCTL_AVAILABLE = False
+
+from services.domain_adapter import DomainAdapter
+
+def _address_space_bytes() -> Optional[int]:
+    """Current virtual memory size of this process (Linux), None when unknown"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+def apply_budget(cpu_seconds: Optional[int], memory_bytes: Optional[int], threads: Optional[int]):
+    """Limit this process; returns the threadpoolctl limiter, which must stay referenced"""
+    limiter = threadpool_limits(limits=threads) if threads and THREADPOOLCTL_AVAILABLE else None
+    if not RESOURCE_AVAILABLE:
+        return limiter
+    if cpu_seconds:
+        # SIGXCPU at the soft limit, SIGKILL at the hard one
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 5))
+    if memory_bytes:
+        # The budget is for training; the interpreter and imported libraries are already mapped
+        limit = (_address_space_bytes() or 0) + memory_bytes
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    return limiter
+
+def main() -> int:
+    # Messages get stdout to themselves; anything else printed goes to stderr
+    messages = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    
+    def send(message):
+        pickle.dump(message, messages, protocol=pickle.HIGHEST_PROTOCOL)
+        messages.flush()
+    
+    budget: Dict = pickle.load(sys.stdin.buffer)
+    limiter = apply_budget(budget.get('cpu_seconds'), budget.get('memory_bytes'), budget.get('threads'))
+    reported = [0.0]
+    
+    def progress(fraction: float):
+        # A message per 5% of boosting stages is enough for polling clients
+        if fraction - reported[0] >= 0.05 or fraction >= 1.0:
+            reported[0] = fraction
+            send(('progress', fraction))
+    
+    try:
+        job: Dict = pickle.load(sys.stdin.buffer)
+        adapter = DomainAdapter(job['domain'], **job['options'])
+        adapter.train(job['features'], job['labels'], progress=progress)
+    except MemoryError:
+        send(('error', f"Training exceeded the memory budget of {(budget.get('memory_bytes') or 0) >> 20} MiB"))
+        return 1
+    except Exception as e:
+        send(('error', f"{type(e).__name__}: {e}"))
+        return 1
+    send(('done', adapter))
+    del limiter
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
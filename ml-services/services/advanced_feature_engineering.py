@@ -3,24 +3,134 @@ Advanced Feature Engineering for Sports Predictions
 Creates sophisticated features to make our system the most advanced in the market
 """
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
+from scipy.signal import lfilter
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from datetime import datetime, timedelta
 import math
 
+from services.feature_cache import FeatureCache
+from services.feature_schema import FeatureSchema
+from services.match_results_store import MatchResultsStore
+from services.odds_resampler import OddsBars
+from services.streaming_stats import SelectionStats
+from services.team_form_index import TeamFormIndex
+from services.team_ratings import RATING_FEATURE_COLUMNS, EloRatings
+from services.team_strength import STRENGTH_FEATURE_COLUMNS, TeamStrengthModel
+
+# Column order of calculate_technical_indicators_batch
+TECHNICAL_INDICATOR_COLUMNS = (
+    'rsi',
+    'macd',
+    'macd_signal',
+    'macd_histogram',
+    'bollinger_upper',
+    'bollinger_lower',
+    'bollinger_middle',
+    'bollinger_width',
+    'bollinger_position',
+    'momentum_14',
+    'stochastic',
+    'support_level',
+    'resistance_level',
+    'distance_to_support',
+    'distance_to_resistance',
+    'market_activity',
+)
+
+MARKET_FEATURE_COLUMNS = (
+    'market_consensus',
+    'market_std',
+    'sharp_money_indicator',
+    'market_efficiency',
+    'value_concentration',
+    'bookmaker_disagreement',
+    'market_depth',
+    'odds_spread',
+    'value_opportunity',
+    'prob_min',
+    'prob_max',
+    'prob_range',
+    'prob_skew',
+    'prob_skew_abs',
+    'market_confidence',
+)
+
+FORM_FEATURE_COLUMNS = (
+    'win_rate_5',
+    'win_rate_10',
+    'goals_for_avg_5',
+    'goals_against_avg_5',
+    'goal_difference_5',
+    'current_streak',
+    'is_winning_streak',
+    'is_losing_streak',
+    'form_trend',
+    'clean_sheet_rate_5',
+    'over_2_5_rate',
+)
+
+H2H_FEATURE_COLUMNS = (
+    'h2h_win_rate_team1',
+    'h2h_win_rate_team2',
+    'h2h_draw_rate',
+    'h2h_goals_team1_avg',
+    'h2h_goals_team2_avg',
+    'h2h_total_goals_avg',
+    'h2h_recent_trend',
+    'h2h_home_advantage',
+)
+
+CONTEXTUAL_FEATURE_COLUMNS = (
+    'days_until_event',
+    'hours_until_event',
+    'is_imminent',
+    'is_far_future',
+    'event_importance',
+    'day_of_week',
+    'is_weekend',
+    'hour_of_day',
+    'is_evening',
+)
+
+RELATIVE_FEATURE_COLUMNS = (
+    'form_advantage',
+    'goals_advantage',
+    'defense_advantage',
+)
+
+# Every feature create_all_features can produce, in a fixed column order
+ADVANCED_FEATURE_SCHEMA = FeatureSchema(
+    TECHNICAL_INDICATOR_COLUMNS
+    + MARKET_FEATURE_COLUMNS
+    + tuple(f'home_{name}' for name in FORM_FEATURE_COLUMNS) + ('home_home_win_rate',)
+    + tuple(f'away_{name}' for name in FORM_FEATURE_COLUMNS) + ('away_away_win_rate',)
+    + H2H_FEATURE_COLUMNS
+    + CONTEXTUAL_FEATURE_COLUMNS
+    + RELATIVE_FEATURE_COLUMNS
+    + RATING_FEATURE_COLUMNS
+    + STRENGTH_FEATURE_COLUMNS
+)
+
 class AdvancedFeatureEngineering:
     """
     Advanced feature engineering for sports predictions
     Creates features that give us competitive advantage
     """
     
-    def __init__(self):
-        self.feature_cache = {}
+    def __init__(self, feature_cache: Optional[FeatureCache] = None):
+        # Content-addressed cache for create_all_features (LRU + TTL + memory cap)
+        self.feature_cache = feature_cache if feature_cache is not None else FeatureCache()
+        # event id -> (raw start time, UTC microseconds, UTC offset seconds)
+        self._start_time_cache: Dict[str, Tuple[object, int, int]] = {}
     
-    def calculate_technical_indicators(self, odds_history: List[float]) -> Dict[str, float]:
+    def calculate_technical_indicators(self, odds_history: Union[List[float], OddsBars]) -> Dict[str, float]:
         """
         Calculate advanced technical indicators from odds history
         Similar to stock market technical analysis
+        Accepts raw ticks or resampled OddsBars (one period per bar close)
         """
+        odds_history = self._odds_series(odds_history)
         if not odds_history or len(odds_history) < 2:
             return {
                 'rsi': 50.0,
@@ -76,16 +186,190 @@ class AdvancedFeatureEngineering:
         
         return features
     
-    def calculate_market_intelligence(self, 
-                                     all_odds: List[float],
-                                     bookmaker_weights: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    def calculate_technical_indicators_batch(self,
+                                             odds_histories: Union[np.ndarray, Sequence[Sequence[float]], Sequence[OddsBars]],
+                                             lengths: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Vectorized calculate_technical_indicators for many odds histories at once
+        
+        Accepts either a list of ragged odds series (or OddsBars), or a padded 2-D array plus
+        `lengths` (1-D valid length per row, or a 2-D boolean mask of valid entries).
+        Returns one array per indicator (TECHNICAL_INDICATOR_COLUMNS), where row i
+        matches calculate_technical_indicators(series i). Indicators the scalar path
+        leaves out for histories shorter than 2 odds are NaN.
+        """
+        odds, rows, raw_counts = self._flatten_odds_batch(odds_histories, lengths)
+        n_series = len(raw_counts)
+        
+        # Convert odds to probabilities, dropping non-positive odds per series
+        valid = odds > 0
+        probs = 1.0 / odds[valid]
+        rows = rows[valid]
+        valid_counts = np.bincount(rows, minlength=n_series)
+        
+        # Left-aligned padded price matrix (NaN after each series' end)
+        fallback = valid_counts < 2
+        counts = np.where(fallback, 2, valid_counts)
+        width = int(counts.max()) if n_series else 2
+        prices = np.full((n_series, width), np.nan)
+        starts = np.cumsum(valid_counts) - valid_counts
+        prices[rows, np.arange(len(probs)) - starts[rows]] = probs
+        prices[fallback] = np.nan
+        prices[fallback, :2] = 0.5
+        
+        index = np.arange(n_series)
+        current = prices[index, counts - 1]
+        columns = {name: np.full(n_series, np.nan) for name in TECHNICAL_INDICATOR_COLUMNS}
+        
+        # 1. RSI - 14 period
+        rsi = np.full(n_series, 50.0)
+        has_rsi = counts >= 15
+        if has_rsi.any():
+            window = self._last_window(prices[has_rsi], counts[has_rsi], 15)
+            deltas = window[:, 1:] - window[:, :-1]
+            avg_gain = np.where(deltas > 0, deltas, 0.0).mean(axis=1)
+            avg_loss = np.where(deltas < 0, -deltas, 0.0).mean(axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                value = 100 - (100 / (1 + avg_gain / avg_loss))
+            rsi[has_rsi] = np.where(avg_loss == 0, 100.0, value)
+        columns['rsi'] = rsi
+        
+        # 2. MACD
+        macd = np.zeros(n_series)
+        signal = np.zeros(n_series)
+        has_macd = counts >= 26
+        if has_macd.any():
+            sub_prices = prices[has_macd]
+            last = counts[has_macd] - 1
+            sub_index = np.arange(len(sub_prices))
+            macd_rows = self._ema_rows(sub_prices, 12) - self._ema_rows(sub_prices, 26)
+            macd[has_macd] = macd_rows[sub_index, last]
+            signal[has_macd] = self._ema_rows(macd_rows, 9)[sub_index, last]
+        columns['macd'] = macd
+        columns['macd_signal'] = signal
+        columns['macd_histogram'] = macd - signal
+        
+        # 3. Bollinger Bands - 20 period (shorter histories use all their prices)
+        bb_period = np.minimum(20, counts)
+        for period in np.unique(bb_period):
+            selected = bb_period == period
+            window = self._last_window(prices[selected], counts[selected], int(period))
+            middle = window.mean(axis=1)
+            std = window.std(axis=1)
+            upper = middle + (2.0 * std)
+            lower = middle - (2.0 * std)
+            band = upper - lower
+            with np.errstate(divide='ignore', invalid='ignore'):
+                columns['bollinger_width'][selected] = np.where(middle > 0, band / middle, 0.0)
+                columns['bollinger_position'][selected] = np.where(
+                    band > 0, (current[selected] - lower) / band, 0.5
+                )
+            columns['bollinger_upper'][selected] = upper
+            columns['bollinger_lower'][selected] = lower
+            columns['bollinger_middle'][selected] = middle
+        
+        # 4. Momentum - 14 period
+        has_momentum = counts >= 15
+        columns['momentum_14'] = np.zeros(n_series)
+        columns['momentum_14'][has_momentum] = (
+            current[has_momentum] - prices[index, counts - 15][has_momentum]
+        )
+        
+        # 5. Stochastic Oscillator - 14 period
+        low, high = self._window_min_max(prices, counts, np.minimum(14, counts))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stochastic = ((current - low) / (high - low)) * 100
+        columns['stochastic'] = np.where(high == low, 50.0, stochastic)
+        
+        # 6. Support and Resistance levels - last 20 prices
+        support, resistance = self._window_min_max(prices, counts, np.minimum(20, counts))
+        sr_range = resistance - support
+        with np.errstate(divide='ignore', invalid='ignore'):
+            to_support = np.where(sr_range > 0, (current - support) / sr_range, 0.5)
+            to_resistance = np.where(sr_range > 0, (resistance - current) / sr_range, 0.5)
+        short = counts < 5
+        columns['support_level'] = support
+        columns['resistance_level'] = resistance
+        columns['distance_to_support'] = np.where(short, 0.0, to_support)
+        columns['distance_to_resistance'] = np.where(short, 0.0, to_resistance)
+        
+        # 7. Market activity
+        columns['market_activity'] = raw_counts / 100.0
+        
+        # Histories with fewer than 2 odds get the scalar defaults
+        too_short = raw_counts < 2
+        if too_short.any():
+            defaults = self.calculate_technical_indicators([])
+            for name in TECHNICAL_INDICATOR_COLUMNS:
+                columns[name][too_short] = defaults.get(name, np.nan)
+        
+        return columns
+    
+    def calculate_technical_indicator_series(self, odds_history: Union[Sequence[float], OddsBars]) -> Dict[str, np.ndarray]:
+        """
+        Technical indicators at every tick of an odds history (for training rows)
+        With OddsBars, at every bar close
+        
+        Element t of each array equals calculate_technical_indicators(odds_history[:t + 1]),
+        up to float rounding (flat windows get an exact zero band width), plus 'ema_12'
+        and 'ema_26' series. Computed in O(n) with
+        linear filters (EMA, MACD, signal), cumulative sums (RSI, Bollinger) and
+        running min/max filters (stochastic, support/resistance).
+        """
+        odds = np.asarray(self._odds_series(odds_history), dtype=float).ravel()
+        n_ticks = len(odds)
+        valid = odds > 0
+        prices = 1.0 / odds[valid]
+        n_prices = len(prices)
+        
+        names = TECHNICAL_INDICATOR_COLUMNS + ('ema_12', 'ema_26')
+        series = {name: np.full(n_prices, np.nan) for name in names}
+        if n_prices >= 2:
+            series.update(self._indicator_series(prices))
+        
+        # Map every tick to the last valid price seen so far
+        seen = np.cumsum(valid)
+        aligned = {name: values[np.maximum(seen - 1, 0)] if n_prices else np.full(n_ticks, np.nan)
+                   for name, values in series.items()}
+        aligned['market_activity'] = np.arange(1, n_ticks + 1) / 100.0
+        
+        # Ticks with fewer than 2 usable prices fall back like the scalar path
+        fallback = (seen < 2) & (np.arange(n_ticks) >= 1)
+        if fallback.any():
+            for name, value in self.calculate_technical_indicators([2.0, 2.0]).items():
+                if name != 'market_activity':
+                    aligned[name][fallback] = value
+        if n_ticks:
+            defaults = self.calculate_technical_indicators([])
+            for name in TECHNICAL_INDICATOR_COLUMNS:
+                aligned[name][0] = defaults.get(name, np.nan)
+        
+        return aligned
+    
+    def calculate_market_intelligence(self,
+                                     all_odds: Union[List[float], SelectionStats],
+                                     bookmaker_weights: Optional[Dict[str, float]] = None,
+                                     bookmakers: Optional[List[str]] = None) -> Dict[str, float]:
         """
         Advanced market intelligence features
         Detects sharp money, line movement, market efficiency
+        With `bookmakers` (one name per odd) and `bookmaker_weights`, the consensus,
+        std and skew are weighted (unlisted bookmakers weigh 1.0)
+        `all_odds` may also be a SelectionStats summary of implied probabilities, for
+        streams too long to keep as a list (median within the sketch's rank error)
         """
+        if isinstance(all_odds, SelectionStats):
+            return self._market_features_from_stats(all_odds)
         if not all_odds or len(all_odds) == 0:
             return self._default_market_features()
         
+        if bookmaker_weights and bookmakers is not None:
+            if len(bookmakers) != len(all_odds):
+                raise ValueError("bookmakers must name the bookmaker of every odd")
+            weights = np.array([bookmaker_weights.get(name, 1.0) for name in bookmakers], dtype=float)
+            batch = self.calculate_market_intelligence_batch(np.array([all_odds], dtype=float), weights)
+            return {name: float(values[0]) for name, values in batch.items()}
+        
         probs = [1.0 / odd for odd in all_odds if odd > 0]
         if len(probs) == 0:
             return self._default_market_features()
@@ -144,6 +428,123 @@ class AdvancedFeatureEngineering:
         
         return features
     
+    def _market_features_from_stats(self, stats: SelectionStats) -> Dict[str, float]:
+        """calculate_market_intelligence from a streaming summary of implied probabilities"""
+        if stats.count == 0:
+            return self._default_market_features()
+        
+        features = {}
+        std_prob = stats.std
+        features['market_consensus'] = 1.0 - min(std_prob * 2, 0.5)
+        features['market_std'] = std_prob
+        features['sharp_money_indicator'] = min(abs(stats.last - stats.first) * 10, 1.0) if stats.count >= 2 else 0.5
+        features['market_efficiency'] = 1.0 - std_prob
+        cv = std_prob / stats.mean if stats.mean > 0 else 0
+        features['value_concentration'] = 1.0 - min(cv, 1.0) if stats.count >= 2 else 1.0
+        features['bookmaker_disagreement'] = std_prob * 2
+        features['market_depth'] = min(stats.count / 20.0, 1.0)
+        
+        if stats.count > 1:
+            # Best odds = 1 / lowest probability, worst odds = 1 / highest probability
+            features['odds_spread'] = (1.0 / stats.min - 1.0 / stats.max) * stats.max
+            features['value_opportunity'] = features['odds_spread'] * features['bookmaker_disagreement']
+        else:
+            features['odds_spread'] = 0.0
+            features['value_opportunity'] = 0.0
+        
+        features['prob_min'] = stats.min
+        features['prob_max'] = stats.max
+        features['prob_range'] = stats.max - stats.min
+        features['prob_skew'] = stats.mean - stats.median
+        features['prob_skew_abs'] = abs(features['prob_skew'])
+        features['market_confidence'] = (features['market_consensus'] * 0.7) + (features['market_depth'] * 0.3)
+        return features
+    
+    def calculate_market_intelligence_batch(self,
+                                           odds_matrix: Union[np.ndarray, Sequence[Sequence[float]]],
+                                           weights: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Vectorized calculate_market_intelligence over an (events x bookmakers) odds
+        matrix, NaN where a bookmaker has no quote (ragged lists are NaN-padded)
+        
+        `weights` is a per-bookmaker vector (or an events x bookmakers matrix); the
+        consensus, std, efficiency, concentration, disagreement and skew use weighted
+        moments and a weighted median. Without weights, row i matches
+        calculate_market_intelligence(non-NaN odds of row i) to rounding. Returns one
+        array per MARKET_FEATURE_COLUMNS entry; rows without a positive odd get the
+        scalar defaults.
+        """
+        if isinstance(odds_matrix, np.ndarray) and odds_matrix.ndim == 2:
+            odds = np.asarray(odds_matrix, dtype=float)
+        else:
+            rows = [np.asarray(row, dtype=float).ravel() for row in odds_matrix]
+            odds = np.full((len(rows), max((len(row) for row in rows), default=0)), np.nan)
+            for i, row in enumerate(rows):
+                odds[i, :len(row)] = row
+        n_events, n_books = odds.shape
+        
+        quoted = ~np.isnan(odds)
+        valid = quoted & (odds > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            probs = np.where(valid, 1.0 / odds, np.nan)
+        
+        if weights is None:
+            w = valid.astype(float)
+        else:
+            w = np.where(valid, np.broadcast_to(np.asarray(weights, dtype=float), odds.shape), 0.0)
+        total = w.sum(axis=1)
+        n_quotes = quoted.sum(axis=1)
+        n_probs = valid.sum(axis=1)
+        has = (n_probs > 0) & (total > 0)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 1. Weighted mean / std of implied probabilities
+            filled = np.where(valid, probs, 0.0)
+            mean = (w * filled).sum(axis=1) / total
+            std = np.sqrt((w * (filled - mean[:, None]) ** 2).sum(axis=1) / total)
+            
+            features = {}
+            features['market_consensus'] = 1.0 - np.minimum(std * 2, 0.5)
+            features['market_std'] = std
+            
+            # 2. Sharp money: first vs last quoted probability
+            index = np.arange(n_events)
+            first = valid.argmax(axis=1) if n_books else np.zeros(n_events, dtype=np.intp)
+            last = n_books - 1 - valid[:, ::-1].argmax(axis=1) if n_books else first
+            trend = probs[index, last] - probs[index, first] if n_books else np.zeros(n_events)
+            features['sharp_money_indicator'] = np.where(n_probs < 2, 0.5, np.minimum(np.abs(trend) * 10, 1.0))
+            
+            # 3-5. Efficiency, concentration, disagreement
+            features['market_efficiency'] = 1.0 - std
+            cv = np.where(mean > 0, std / mean, 0.0)
+            features['value_concentration'] = np.where(n_probs < 2, 1.0, 1.0 - np.minimum(cv, 1.0))
+            features['bookmaker_disagreement'] = std * 2
+            
+            # 6. Depth counts every quote
+            features['market_depth'] = np.minimum(n_quotes / 20.0, 1.0)
+            
+            # 7. Best vs worst odds spread
+            best = np.where(quoted, odds, -np.inf).max(axis=1) if n_books else np.zeros(n_events)
+            worst = np.where(quoted, odds, np.inf).min(axis=1) if n_books else np.ones(n_events)
+            multi = n_quotes > 1
+            features['odds_spread'] = np.where(multi, (best - worst) / worst, 0.0)
+            features['value_opportunity'] = np.where(multi, features['odds_spread'] * features['bookmaker_disagreement'], 0.0)
+            
+            # 8. Implied probability range
+            features['prob_min'] = np.where(valid, probs, np.inf).min(axis=1) if n_books else np.zeros(n_events)
+            features['prob_max'] = np.where(valid, probs, -np.inf).max(axis=1) if n_books else np.zeros(n_events)
+            features['prob_range'] = features['prob_max'] - features['prob_min']
+            
+            # 9. Weighted mean vs weighted median
+            features['prob_skew'] = mean - self._weighted_median_rows(probs, w, total)
+            features['prob_skew_abs'] = np.abs(features['prob_skew'])
+            
+            # 10. Market Confidence
+            features['market_confidence'] = (features['market_consensus'] * 0.7) + (features['market_depth'] * 0.3)
+        
+        defaults = self._default_market_features()
+        return {name: np.where(has, features[name], defaults[name]) for name in MARKET_FEATURE_COLUMNS}
+    
     def calculate_team_form_features(self,
                                     recent_results: List[Dict],
                                     team_name: str,
@@ -303,6 +704,86 @@ class AdvancedFeatureEngineering:
         
         return features
     
+    def calculate_contextual_features_batch(self,
+                                            start_times: Sequence,
+                                            prediction_time: Union[datetime, np.ndarray, Sequence[datetime]],
+                                            event_ids: Optional[Sequence[str]] = None,
+                                            importance: Optional[Sequence[float]] = None) -> Dict[str, np.ndarray]:
+        """
+        Vectorized calculate_contextual_features for a column of start times
+        (ISO strings or datetimes, None when unknown) and one prediction time or one
+        per event. Row i matches calculate_contextual_features for event i, including
+        weekday/hour in the start time's own UTC offset. Parsed start times are
+        cached per event id, so repeated fixture lists skip parsing.
+        """
+        n_events = len(start_times)
+        utc_us = np.zeros(n_events, dtype=np.int64)
+        offsets = np.zeros(n_events, dtype=np.int64)
+        known = np.zeros(n_events, dtype=bool)
+        for i, start_time in enumerate(start_times):
+            if not start_time:
+                continue
+            utc_us[i], offsets[i] = self._parse_start_time(start_time, event_ids[i] if event_ids is not None else None)
+            known[i] = True
+        starts = utc_us.astype('datetime64[us]')
+        
+        if isinstance(prediction_time, datetime):
+            predictions = np.datetime64(self._utc_microseconds(prediction_time)[0], 'us')
+        else:
+            predictions = np.array([self._utc_microseconds(t)[0] for t in prediction_time], dtype=np.int64).astype('datetime64[us]')
+        
+        features = {}
+        
+        # 1. Days until event
+        days_until = np.where(known, (starts - predictions) / np.timedelta64(1, 'D'), 0.0)
+        features['days_until_event'] = days_until
+        features['hours_until_event'] = days_until * 24
+        features['is_imminent'] = np.where(known & (days_until < 1), 1.0, 0.0)
+        features['is_far_future'] = np.where(known & (days_until > 7), 1.0, 0.0)
+        
+        # 2. Event Importance
+        features['event_importance'] = (np.full(n_events, 0.5) if importance is None
+                                        else np.array([0.5 if v is None else v for v in importance], dtype=float))
+        
+        # 3-4. Day of week and hour, in the start time's local offset (1970-01-01 was a Thursday)
+        local = starts + offsets.astype('timedelta64[s]')
+        local_days = local.astype('datetime64[D]')
+        weekday = (local_days.astype(np.int64) + 3) % 7
+        hour = ((local - local_days) // np.timedelta64(1, 'h')).astype(np.int64)
+        features['day_of_week'] = np.where(known, weekday / 6.0, 0.5)
+        features['is_weekend'] = np.where(known & (weekday >= 5), 1.0, 0.0)
+        features['hour_of_day'] = np.where(known, hour / 23.0, 0.5)
+        features['is_evening'] = np.where(known & (hour >= 18) & (hour <= 22), 1.0, 0.0)
+        
+        return features
+    
+    def _parse_start_time(self, start_time, event_id: Optional[str]) -> Tuple[int, int]:
+        """(UTC microseconds, UTC offset seconds) of a start time, cached per event id"""
+        if event_id is not None:
+            cached = self._start_time_cache.get(event_id)
+            if cached is not None and cached[0] == start_time:
+                return cached[1], cached[2]
+        value = start_time
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        parsed = self._utc_microseconds(value)
+        if event_id is not None:
+            if len(self._start_time_cache) >= 100000:
+                self._start_time_cache.clear()
+            # Keyed on the raw value so a repeated ISO string skips parsing
+            self._start_time_cache[event_id] = (start_time, parsed[0], parsed[1])
+        return parsed
+    
+    @staticmethod
+    def _utc_microseconds(value: datetime) -> Tuple[int, int]:
+        """(microseconds since the epoch in UTC, UTC offset in seconds); naive datetimes count as UTC"""
+        offset = value.utcoffset()
+        offset_seconds = int(offset.total_seconds()) if offset is not None else 0
+        naive = value.replace(tzinfo=None)
+        delta = naive - datetime(1970, 1, 1)
+        micros = (delta.days * 86400 + delta.seconds) * 10**6 + delta.microseconds
+        return micros - offset_seconds * 10**6, offset_seconds
+    
     def create_all_features(self,
                            event: Dict,
                            odds_history: List[float],
@@ -310,59 +791,231 @@ class AdvancedFeatureEngineering:
                            team1_form: Optional[List[Dict]] = None,
                            team2_form: Optional[List[Dict]] = None,
                            h2h_history: Optional[List[Dict]] = None,
-                           prediction_time: Optional[datetime] = None) -> Dict[str, float]:
+                           prediction_time: Optional[datetime] = None,
+                           technical_features: Optional[Dict[str, float]] = None,
+                           form_index: Optional[TeamFormIndex] = None,
+                           results_store: Optional[MatchResultsStore] = None,
+                           ratings: Optional[EloRatings] = None,
+                           team_strength: Optional[TeamStrengthModel] = None) -> Dict[str, float]:
         """
         Create all advanced features for a prediction
         This is the main method that combines everything
+        Pass `technical_features` (e.g. IncrementalIndicators.features()) to skip
+        recomputing indicators from the full odds history, `form_index` to look up
+        team form for teams without an explicit form list, `results_store` to look up
+        head-to-head meetings (before prediction_time) when no h2h_history is given,
+        `ratings` to add Elo rating difference and expected score, and `team_strength`
+        to add Dixon-Coles expected goals and outcome probabilities
         """
         if prediction_time is None:
             prediction_time = datetime.now()
         
+        team1_name = event.get('homeTeam', '')
+        team2_name = event.get('awayTeam', '')
+        
+        index_versions = None
+        if form_index is not None or results_store is not None or ratings is not None or team_strength is not None:
+            index_versions = (
+                form_index.cache_token if form_index else None,
+                form_index.team_version(team1_name) if form_index else 0,
+                form_index.team_version(team2_name) if form_index else 0,
+                results_store.cache_token if results_store else None,
+                len(results_store) if results_store else 0,
+                ratings.cache_token if ratings else None,
+                ratings.version if ratings else 0,
+                team_strength.cache_token if team_strength else None,
+                str(team_strength.fitted_at) if team_strength else None,
+            )
+        cache_key = self.feature_cache.make_key(
+            event, odds_history, all_odds, team1_form, team2_form, h2h_history,
+            prediction_time, technical_features, extra=index_versions
+        )
+        cached = self.feature_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         features = {}
+        for prefix, block in self._feature_blocks(
+            event, odds_history, all_odds, team1_form, team2_form, h2h_history,
+            prediction_time, technical_features, form_index, results_store, ratings, team_strength
+        ):
+            if prefix:
+                for key, value in block.items():
+                    features[f'{prefix}{key}'] = value
+            else:
+                features.update(block)
+        
+        self.feature_cache.set(cache_key, features)
+        return features
+    
+    def create_feature_vector(self,
+                              event: Dict,
+                              odds_history: List[float],
+                              all_odds: List[float],
+                              team1_form: Optional[List[Dict]] = None,
+                              team2_form: Optional[List[Dict]] = None,
+                              h2h_history: Optional[List[Dict]] = None,
+                              prediction_time: Optional[datetime] = None,
+                              technical_features: Optional[Dict[str, float]] = None,
+                              form_index: Optional[TeamFormIndex] = None,
+                              results_store: Optional[MatchResultsStore] = None,
+                              ratings: Optional[EloRatings] = None,
+                              team_strength: Optional[TeamStrengthModel] = None,
+                              contextual_features: Optional[Dict[str, float]] = None,
+                              out: Optional[np.ndarray] = None,
+                              schema: FeatureSchema = ADVANCED_FEATURE_SCHEMA) -> np.ndarray:
+        """
+        Same features as create_all_features, written straight into a float32 row
+        laid out by `schema` (missing features are NaN). Pass `out` to fill a
+        preallocated row or matrix slice in place. `contextual_features` replaces
+        calculate_contextual_features (as technical_features does for indicators).
+        """
+        if prediction_time is None:
+            prediction_time = datetime.now()
+        if out is None:
+            out = schema.empty_row()
+        else:
+            out[:] = np.nan
+        
+        for prefix, block in self._feature_blocks(
+            event, odds_history, all_odds, team1_form, team2_form, h2h_history,
+            prediction_time, technical_features, form_index, results_store, ratings, team_strength,
+            contextual_features
+        ):
+            schema.write(block, out, prefix)
+        return out
+    
+    def create_feature_matrix(self,
+                              samples: Sequence[Dict],
+                              out: Optional[np.ndarray] = None,
+                              schema: FeatureSchema = ADVANCED_FEATURE_SCHEMA) -> np.ndarray:
+        """
+        Feature rows for many events into one (n_samples x n_features) float32 matrix
+        Each sample holds create_feature_vector keyword arguments (event, odds_history,
+        all_odds, team1_form, ...). Technical indicators and contextual features are
+        computed for all samples in one vectorized batch each and written column-wise.
+        """
+        if out is None:
+            out = schema.empty_matrix(len(samples))
+        
+        now = datetime.now()
+        prediction_times = [sample.get('prediction_time') or now for sample in samples]
+        missing = []
+        for row, sample in enumerate(samples):
+            kwargs = dict(sample)
+            kwargs['prediction_time'] = prediction_times[row]
+            kwargs['contextual_features'] = {}  # Filled column-wise below
+            if kwargs.get('technical_features') is None:
+                kwargs['technical_features'] = {}
+                missing.append(row)
+            self.create_feature_vector(**kwargs, out=out[row], schema=schema)
+        
+        # Technical block for all remaining samples, one column at a time
+        if missing:
+            self.write_technical_columns(
+                out, missing, [samples[row].get('odds_history') or [] for row in missing], schema
+            )
+        
+        # Contextual block for all samples
+        if len(samples):
+            events = [sample['event'] for sample in samples]
+            contextual = self.calculate_contextual_features_batch(
+                [event.get('startTime') for event in events], prediction_times,
+                event_ids=[event.get('id') for event in events],
+                importance=[event.get('importance', 0.5) for event in events]
+            )
+            for name in CONTEXTUAL_FEATURE_COLUMNS:
+                if name in schema:
+                    out[:, schema.index[name]] = contextual[name]
+        return out
+    
+    def write_technical_columns(self,
+                                out: np.ndarray,
+                                rows: Sequence[int],
+                                odds_histories: Sequence[Sequence[float]],
+                                schema: FeatureSchema = ADVANCED_FEATURE_SCHEMA) -> np.ndarray:
+        """Technical indicators of many odds histories written into `out[rows]`, column-wise"""
+        technical = self.calculate_technical_indicators_batch(odds_histories)
+        rows = np.asarray(rows, dtype=np.intp)
+        for name in TECHNICAL_INDICATOR_COLUMNS:
+            if name in schema:
+                out[rows, schema.index[name]] = technical[name]
+        return out
+    
+    def _feature_blocks(self,
+                        event: Dict,
+                        odds_history: List[float],
+                        all_odds: List[float],
+                        team1_form: Optional[List[Dict]],
+                        team2_form: Optional[List[Dict]],
+                        h2h_history: Optional[List[Dict]],
+                        prediction_time: datetime,
+                        technical_features: Optional[Dict[str, float]],
+                        form_index: Optional[TeamFormIndex],
+                        results_store: Optional[MatchResultsStore],
+                        ratings: Optional[EloRatings] = None,
+                        team_strength: Optional[TeamStrengthModel] = None,
+                        contextual_features: Optional[Dict[str, float]] = None) -> List[Tuple[str, Dict[str, float]]]:
+        """Feature groups of create_all_features as (key prefix, features) pairs, in order"""
+        team1_name = event.get('homeTeam', '')
+        team2_name = event.get('awayTeam', '')
+        blocks = []
         
         # 1. Technical Indicators
-        tech_features = self.calculate_technical_indicators(odds_history)
-        features.update(tech_features)
+        if technical_features is None:
+            technical_features = self.calculate_technical_indicators(odds_history)
+        blocks.append(('', technical_features))
         
         # 2. Market Intelligence
-        market_features = self.calculate_market_intelligence(all_odds)
-        features.update(market_features)
+        blocks.append(('', self.calculate_market_intelligence(all_odds)))
         
         # 3. Team Form
-        team1_name = event.get('homeTeam', '')
-        team2_name = event.get('awayTeam', '')
-        
+        team1_form_features = None
         if team1_form:
             team1_form_features = self.calculate_team_form_features(team1_form, team1_name, is_home=True)
-            # Prefix with home_
-            for key, value in team1_form_features.items():
-                features[f'home_{key}'] = value
+        elif form_index is not None:
+            team1_form_features = form_index.form_features(team1_name, is_home=True)
+        if team1_form_features:
+            blocks.append(('home_', team1_form_features))
         
+        team2_form_features = None
         if team2_form:
             team2_form_features = self.calculate_team_form_features(team2_form, team2_name, is_home=False)
-            # Prefix with away_
-            for key, value in team2_form_features.items():
-                features[f'away_{key}'] = value
+        elif form_index is not None:
+            team2_form_features = form_index.form_features(team2_name, is_home=False)
+        if team2_form_features:
+            blocks.append(('away_', team2_form_features))
         
         # 4. Head-to-Head
         if h2h_history and team1_name and team2_name:
-            h2h_features = self.calculate_head_to_head_features(h2h_history, team1_name, team2_name)
-            features.update(h2h_features)
+            blocks.append(('', self.calculate_head_to_head_features(h2h_history, team1_name, team2_name)))
+        elif results_store is not None and team1_name and team2_name:
+            h2h_features = results_store.head_to_head_features(team1_name, team2_name, before=prediction_time)
+            if h2h_features:
+                blocks.append(('', h2h_features))
         
         # 5. Contextual Features
-        contextual_features = self.calculate_contextual_features(event, prediction_time)
-        features.update(contextual_features)
+        if contextual_features is None:
+            contextual_features = self.calculate_contextual_features(event, prediction_time)
+        blocks.append(('', contextual_features))
         
         # 6. Relative Features (comparisons between teams)
-        if team1_form and team2_form:
-            team1_form_features = self.calculate_team_form_features(team1_form, team1_name, is_home=True)
-            team2_form_features = self.calculate_team_form_features(team2_form, team2_name, is_home=False)
-            
-            features['form_advantage'] = team1_form_features.get('win_rate_5', 0.5) - team2_form_features.get('win_rate_5', 0.5)
-            features['goals_advantage'] = team1_form_features.get('goals_for_avg_5', 0) - team2_form_features.get('goals_for_avg_5', 0)
-            features['defense_advantage'] = team2_form_features.get('goals_against_avg_5', 0) - team1_form_features.get('goals_against_avg_5', 0)
-        
-        return features
+        if team1_form_features and team2_form_features:
+            blocks.append(('', {
+                'form_advantage': team1_form_features.get('win_rate_5', 0.5) - team2_form_features.get('win_rate_5', 0.5),
+                'goals_advantage': team1_form_features.get('goals_for_avg_5', 0) - team2_form_features.get('goals_for_avg_5', 0),
+                'defense_advantage': team2_form_features.get('goals_against_avg_5', 0) - team1_form_features.get('goals_against_avg_5', 0),
+            }))
+        
+        # 7. Team ratings
+        if ratings is not None and team1_name and team2_name:
+            blocks.append(('', ratings.features(team1_name, team2_name)))
+        
+        # 8. Attack / defence strength
+        if team_strength is not None and team1_name and team2_name:
+            blocks.append(('', team_strength.features(team1_name, team2_name)))
+        
+        return blocks
     
     # Helper methods for technical indicators
     def _calculate_rsi(self, prices: List[float], period: int = 14) -> float:
@@ -390,13 +1043,11 @@ class AdvancedFeatureEngineering:
         if len(prices) < slow:
             return {'macd': 0.0, 'signal': 0.0, 'histogram': 0.0}
         
-        ema_fast = self._ema(prices, fast)
-        ema_slow = self._ema(prices, slow)
-        macd_line = ema_fast - ema_slow
+        macd_values = self._ema_series(prices, fast) - self._ema_series(prices, slow)
+        macd_line = macd_values[-1]
         
-        # Signal line (EMA of MACD)
-        macd_values = [macd_line] * len(prices)  # Simplified
-        signal_line = self._ema(macd_values, signal) if len(macd_values) >= signal else macd_line
+        # Signal line (EMA of the MACD line)
+        signal_line = self._ema_series(macd_values, signal)[-1]
         
         return {
             'macd': macd_line,
@@ -478,12 +1129,160 @@ class AdvancedFeatureEngineering:
         if len(prices) < period:
             return np.mean(prices) if prices else 0.0
         
-        multiplier = 2.0 / (period + 1)
-        ema = prices[0]
-        
-        for price in prices[1:]:
-            ema = (price * multiplier) + (ema * (1 - multiplier))
+        return self._ema_series(prices, period)[-1]
+    
+    def _ema_series(self, prices: List[float], period: int) -> np.ndarray:
+        """Exponential Moving Average at every price, seeded with the first price"""
+        return self._ema_rows(np.asarray(prices, dtype=float)[None, :], period)[0]
+    
+    # Helper methods for batch technical indicators
+    def _odds_series(self, odds_history):
+        """Bar closes for OddsBars, the input unchanged otherwise"""
+        if isinstance(odds_history, OddsBars):
+            return list(odds_history.close)
+        return odds_history
+    
+    def _flatten_odds_batch(self,
+                            odds_histories: Union[np.ndarray, Sequence[Sequence[float]]],
+                            lengths: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Flatten batch input into (odds, row ids, odds count per row)"""
+        if isinstance(odds_histories, np.ndarray) and odds_histories.ndim == 2:
+            matrix = np.asarray(odds_histories, dtype=float)
+            if lengths is None:
+                mask = np.ones(matrix.shape, dtype=bool)
+            else:
+                lengths = np.asarray(lengths)
+                if lengths.ndim == 2:
+                    mask = lengths.astype(bool)
+                else:
+                    mask = np.arange(matrix.shape[1]) < lengths[:, None]
+            return matrix[mask], np.nonzero(mask)[0], mask.sum(axis=1)
         
+        series = [np.asarray(self._odds_series(s), dtype=float).ravel() for s in odds_histories]
+        raw_counts = np.array([len(s) for s in series], dtype=np.int64)
+        odds = np.concatenate(series) if series else np.empty(0)
+        return odds, np.repeat(np.arange(len(series)), raw_counts), raw_counts
+    
+    def _weighted_median_rows(self, values: np.ndarray, weights: np.ndarray, totals: np.ndarray) -> np.ndarray:
+        """
+        Weighted median of every row (NaN values are ignored); with equal weights this
+        is np.median, averaging the two middle values when the halves balance exactly
+        """
+        if values.shape[1] == 0:
+            return np.zeros(len(values))
+        order = np.argsort(np.where(np.isnan(values), np.inf, values), axis=1, kind='stable')
+        ordered = np.take_along_axis(values, order, axis=1)
+        cumulative = np.cumsum(np.take_along_axis(weights, order, axis=1), axis=1)
+        half = totals[:, None] / 2
+        
+        index = np.arange(len(values))
+        lower = np.minimum((cumulative < half).sum(axis=1), values.shape[1] - 1)
+        balanced = np.isclose(cumulative[index, lower], half[:, 0], rtol=1e-12, atol=0.0)
+        # Next positively weighted value after `lower`
+        ahead = (np.arange(values.shape[1]) > lower[:, None]) & (np.take_along_axis(weights, order, axis=1) > 0)
+        upper = np.where(ahead.any(axis=1), ahead.argmax(axis=1), lower)
+        return np.where(balanced, (ordered[index, lower] + ordered[index, upper]) / 2, ordered[index, lower])
+    
+    def _last_window(self, prices: np.ndarray, counts: np.ndarray, size: int) -> np.ndarray:
+        """Gather the last `size` prices of each row into a contiguous (rows, size) array"""
+        columns = counts[:, None] - size + np.arange(size)
+        return prices[np.arange(len(prices))[:, None], columns]
+    
+    def _window_min_max(self, prices: np.ndarray, counts: np.ndarray, sizes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Min and max over the last `sizes[i]` prices of each row"""
+        columns = np.arange(prices.shape[1])
+        in_window = (columns >= (counts - sizes)[:, None]) & (columns < counts[:, None])
+        low = np.where(in_window, prices, np.inf).min(axis=1)
+        high = np.where(in_window, prices, -np.inf).max(axis=1)
+        return low, high
+    
+    def _indicator_series(self, prices: np.ndarray) -> Dict[str, np.ndarray]:
+        """Indicator values after every price of a probability series (at least 2 prices)"""
+        n = len(prices)
+        position = np.arange(n)
+        count = position + 1
+        series = {}
+        
+        # 1. RSI - plain mean of the last 14 deltas, via cumulative sums
+        deltas = np.diff(prices)
+        gains = np.concatenate(([0.0], np.cumsum(np.where(deltas > 0, deltas, 0.0))))
+        losses = np.concatenate(([0.0], np.cumsum(np.where(deltas < 0, -deltas, 0.0))))
+        rsi = np.full(n, 50.0)
+        end = position[14:]
+        avg_gain = (gains[end] - gains[end - 14]) / 14
+        avg_loss = (losses[end] - losses[end - 14]) / 14
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = 100 - (100 / (1 + avg_gain / avg_loss))
+        rsi[14:] = np.where(avg_loss == 0, 100.0, value)
+        series['rsi'] = rsi
+        
+        # 2. EMA / MACD / signal - linear filters
+        series['ema_12'] = self._ema_series(prices, 12)
+        series['ema_26'] = self._ema_series(prices, 26)
+        macd = series['ema_12'] - series['ema_26']
+        signal = self._ema_series(macd, 9)
+        has_macd = count >= 26
+        series['macd'] = np.where(has_macd, macd, 0.0)
+        series['macd_signal'] = np.where(has_macd, signal, 0.0)
+        series['macd_histogram'] = series['macd'] - series['macd_signal']
+        
+        # 3. Bollinger Bands - rolling mean/std over up to 20 prices, via cumulative sums
+        period = np.minimum(count, 20)
+        low_20 = minimum_filter1d(prices, 20, origin=9, mode='nearest')
+        high_20 = maximum_filter1d(prices, 20, origin=9, mode='nearest')
+        centered = prices - prices.mean()  # Reduces cancellation in the sum of squares
+        sums = np.concatenate(([0.0], np.cumsum(centered)))
+        squares = np.concatenate(([0.0], np.cumsum(centered * centered)))
+        window_sum = sums[count] - sums[count - period]
+        window_mean = window_sum / period
+        variance = np.maximum((squares[count] - squares[count - period]) / period - window_mean ** 2, 0.0)
+        flat = high_20 == low_20
+        middle = np.where(flat, prices, window_mean + prices.mean())
+        std = np.where(flat, 0.0, np.sqrt(variance))
+        upper = middle + (2.0 * std)
+        lower = middle - (2.0 * std)
+        band = upper - lower
+        with np.errstate(divide='ignore', invalid='ignore'):
+            series['bollinger_width'] = np.where(middle > 0, band / middle, 0.0)
+            series['bollinger_position'] = np.where(band > 0, (prices - lower) / band, 0.5)
+        series['bollinger_upper'] = upper
+        series['bollinger_lower'] = lower
+        series['bollinger_middle'] = middle
+        
+        # 4. Momentum - 14 period
+        momentum = np.zeros(n)
+        momentum[14:] = prices[14:] - prices[:-14]
+        series['momentum_14'] = momentum
+        
+        # 5. Stochastic Oscillator - running min/max over up to 14 prices
+        low_14 = minimum_filter1d(prices, 14, origin=6, mode='nearest')
+        high_14 = maximum_filter1d(prices, 14, origin=6, mode='nearest')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stochastic = ((prices - low_14) / (high_14 - low_14)) * 100
+        series['stochastic'] = np.where(high_14 == low_14, 50.0, stochastic)
+        
+        # 6. Support and Resistance levels - last 20 prices
+        sr_range = high_20 - low_20
+        with np.errstate(divide='ignore', invalid='ignore'):
+            to_support = np.where(sr_range > 0, (prices - low_20) / sr_range, 0.5)
+            to_resistance = np.where(sr_range > 0, (high_20 - prices) / sr_range, 0.5)
+        series['support_level'] = low_20
+        series['resistance_level'] = high_20
+        series['distance_to_support'] = np.where(count < 5, 0.0, to_support)
+        series['distance_to_resistance'] = np.where(count < 5, 0.0, to_resistance)
+        
+        return series
+    
+    def _ema_rows(self, prices: np.ndarray, period: int) -> np.ndarray:
+        """Running EMA along each row, seeded with the row's first price (as _ema)"""
+        multiplier = 2.0 / (period + 1)
+        ema = np.empty_like(prices)
+        ema[:, 0] = prices[:, 0]
+        if prices.shape[1] > 1:
+            ema[:, 1:], _ = lfilter(
+                [multiplier], [1.0, -(1 - multiplier)], prices[:, 1:],
+                axis=1, zi=(1 - multiplier) * prices[:, :1]
+            )
         return ema
     
     def _detect_sharp_money(self, probs: List[float]) -> float:
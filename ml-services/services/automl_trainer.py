@@ -22,6 +22,9 @@ import os
 import pickle
 import json
 
+from services.feature_schema import FeatureSchema
+from services.feature_store import FeatureStore
+
 router = APIRouter()
 
 # Try to import AutoML libraries
@@ -61,6 +64,7 @@ class TrainingResponse(BaseModel):
     trainingTime: float
     bestModel: str
     features: List[str]
+    schemaHash: Optional[str] = None
     timestamp: datetime
 
 class AutoMLTrainer:
@@ -76,44 +80,66 @@ class AutoMLTrainer:
     def prepare_data(self, training_data: List[Dict]) -> tuple:
         """
         Prepare data for training
-        Returns: (X, y) where X is features and y is labels
+        Returns: (X, y, feature_names) where X is a float32 matrix laid out by the
+        feature schema of the first sample (see schema_for)
         """
         if not training_data:
             raise ValueError("Training data is empty")
         
-        # Extract features and labels
-        features_list = []
-        labels_list = []
-        feature_names = None
+        schema = self.schema_for(training_data)
+        X = schema.empty_matrix(len(training_data), fill_value=0.0)
+        y = np.empty(len(training_data))
         
-        for sample in training_data:
-            # Get features
-            if isinstance(sample.get("features"), dict):
-                features = sample["features"]
-                if feature_names is None:
-                    feature_names = list(features.keys())
-                feature_vector = [features.get(name, 0.0) for name in feature_names]
-            elif isinstance(sample.get("features"), list):
-                feature_vector = sample["features"]
-                if feature_names is None:
-                    feature_names = [f"feature_{i}" for i in range(len(feature_vector))]
+        for row, sample in enumerate(training_data):
+            # Get features, written straight into the preallocated row
+            features = sample.get("features")
+            if isinstance(features, dict):
+                schema.write(features, X[row])
+            elif isinstance(features, list):
+                X[row] = features
             else:
                 raise ValueError("Features must be dict or list")
             
             # Get label
-            label = sample.get("outcome", sample.get("label", sample.get("probability", 0.5)))
-            
-            features_list.append(feature_vector)
-            labels_list.append(label)
-        
-        X = np.array(features_list)
-        y = np.array(labels_list)
+            y[row] = sample.get("outcome", sample.get("label", sample.get("probability", 0.5)))
         
         # For classification, convert to binary if needed
         if len(np.unique(y)) == 2:
             y = (y > 0.5).astype(int)
         
-        return X, y, feature_names
+        return X, y, list(schema.names)
+    
+    def prepare_data_from_store(self,
+                                store: FeatureStore,
+                                sports: Optional[List[str]] = None,
+                                start: Optional[str] = None,
+                                end: Optional[str] = None,
+                                columns: Optional[List[str]] = None,
+                                where: Optional[List[tuple]] = None) -> tuple:
+        """
+        Same (X, y, feature_names) as prepare_data, read from persisted feature partitions
+        (pruned by sport/date, projected to `columns`, filtered by `where` predicates)
+        """
+        frame, _ = store.read(sports=sports, start=start, end=end, columns=columns, where=where)
+        if len(frame) == 0:
+            raise ValueError("No stored features for the requested partitions")
+        if frame.labels is None:
+            raise ValueError("Stored partitions have no labels")
+        
+        y = frame.labels.astype(float)
+        if len(np.unique(y)) == 2:
+            y = (y > 0.5).astype(int)
+        
+        return frame.matrix, y, frame.columns
+    
+    def schema_for(self, training_data: List[Dict]) -> FeatureSchema:
+        """Feature schema (ordered names) taken from the first sample"""
+        features = training_data[0].get("features")
+        if isinstance(features, dict):
+            return FeatureSchema(features.keys())
+        if isinstance(features, list):
+            return FeatureSchema(f"feature_{i}" for i in range(len(features)))
+        raise ValueError("Features must be dict or list")
     
     def train_autosklearn(
         self,
@@ -276,6 +302,7 @@ class AutoMLTrainer:
         try:
             # Prepare data
             X, y, feature_names = self.prepare_data(request.trainingData)
+            schema = FeatureSchema(feature_names)
             
             print(f"Training with {len(X)} samples, {len(feature_names)} features")
             print(f"Framework: {request.framework}, Task: {request.task}")
@@ -321,6 +348,7 @@ class AutoMLTrainer:
                 "model": model,
                 "path": model_path,
                 "features": feature_names,
+                "schema_hash": schema.schema_hash,
                 "score": score,
                 "trained_at": datetime.now(),
             }
@@ -334,6 +362,7 @@ class AutoMLTrainer:
                 trainingTime=training_time,
                 bestModel=best_model,
                 features=feature_names,
+                schemaHash=schema.schema_hash,
                 timestamp=datetime.now()
             )
             
@@ -341,9 +370,10 @@ class AutoMLTrainer:
             print(f"Training error: {e}")
             raise HTTPException(status_code=500, detail=f"Training failed: {str(e)}")
     
-    def predict(self, framework: str, domain: str, features: np.array) -> np.array:
+    def predict(self, framework: str, domain: str, features: np.array, schema_hash: Optional[str] = None) -> np.array:
         """
         Make predictions with trained model
+        If `schema_hash` is given it must match the schema the model was trained on
         """
         model_key = f"{framework}_{domain}"
         if model_key not in self.trained_models:
@@ -351,6 +381,10 @@ class AutoMLTrainer:
         
         model_info = self.trained_models[model_key]
         model = model_info["model"]
+        if schema_hash is not None and schema_hash != model_info["schema_hash"]:
+            raise ValueError(
+                f"Feature schema mismatch: model trained on {model_info['schema_hash']}, got {schema_hash}"
+            )
         
         if framework == "autogluon":
             df = pd.DataFrame(features, columns=model_info["features"])
@@ -374,14 +408,15 @@ async def train_model(request: TrainingRequest):
 async def predict_with_automl(
     framework: str,
     domain: str,
-    features: List[List[float]]
+    features: List[List[float]],
+    schemaHash: Optional[str] = None
 ):
     """
     Make predictions with trained AutoML model
     """
     try:
-        X = np.array(features)
-        predictions = trainer.predict(framework, domain, X)
+        X = np.array(features, dtype=np.float32)
+        predictions = trainer.predict(framework, domain, X, schema_hash=schemaHash)
         return {
             "success": True,
             "predictions": predictions.tolist()
@@ -413,6 +448,7 @@ async def get_trained_models():
             "path": info["path"],
             "score": info["score"],
             "features": info["features"],
+            "schemaHash": info["schema_hash"],
             "trained_at": info["trained_at"].isoformat()
         })
     return {"models": models}
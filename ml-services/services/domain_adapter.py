@@ -0,0 +1,214 @@
+"""
+Domain Adapter
+Small per-domain model that adjusts the universal predictor's base predictions.
+
+Kept in its own module (re-exported by universal_predictor) so training workers
+can build adapters without importing the predictor's deep learning stack.
+"""
+from typing import Callable, Optional
+import copy
+import numpy as np
+
+from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import SGDRegressor
+
+class DomainAdapter:
+    """
+    Small adapter model that adjusts base predictions for specific domains
+    Trains quickly with domain-specific data
+    
+    update() folds new labeled outcomes into a trained adapter at a bounded cost:
+    the boosting model is warm-started with a few more stages fitted on the most
+    recent `update_window` rows (new ones included; fitting them on a small batch
+    alone overfits it), and (with `incremental`) an SGD learner takes a partial_fit
+    step on the new rows; its prediction is averaged with the boosting model's.
+    The boosting model's scaler stays fixed until the next full fit (its frozen
+    trees split on thresholds in that scaled space); the SGD learner has its own
+    scaler, whose running statistics follow the new rows. The last `max_history`
+    rows are kept for periodic full refits (see needs_refit).
+    """
+    
+    def __init__(self,
+                 domain: str,
+                 incremental: bool = False,
+                 stages_per_update: int = 2,
+                 update_window: int = 1000,
+                 max_history: int = 50000):
+        self.domain = domain
+        self.incremental = incremental
+        self.stages_per_update = stages_per_update
+        self.update_window = update_window
+        self.max_history = max_history
+        # Small model (trains fast)
+        self.model = self._new_model()
+        self.online_model = self._new_online_model() if incremental else None
+        self.scaler = StandardScaler()
+        self.online_scaler = StandardScaler() if incremental else None
+        self.is_trained = False
+        self.version: Optional[int] = None  # AdapterStore version once saved
+        self.history_features: Optional[np.ndarray] = None
+        self.history_labels: Optional[np.ndarray] = None
+        self.rows_seen = 0  # Rows ever passed to train() / update()
+        self.rows_at_refit = 0
+        self.rows_since_refit = 0
+        self.updates_since_refit = 0
+    
+    def __setstate__(self, state):
+        """Backfill attributes that artifacts saved before incremental updates don't have"""
+        self.__dict__.update(state)
+        defaults = {
+            'incremental': False,
+            'stages_per_update': 2,
+            'update_window': 1000,
+            'max_history': 50000,
+            'online_model': None,
+            'version': None,
+            'history_features': None,
+            'history_labels': None,
+            'rows_seen': 0,
+            'rows_at_refit': 0,
+            'rows_since_refit': 0,
+            'updates_since_refit': 0,
+        }
+        for name, value in defaults.items():
+            if name not in self.__dict__:
+                setattr(self, name, value)
+        if 'online_scaler' not in self.__dict__:
+            # Online learners saved before they had their own scaler were fitted in the shared one's space
+            self.online_scaler = copy.deepcopy(self.scaler) if self.online_model is not None else None
+    
+    @staticmethod
+    def _new_model() -> GradientBoostingRegressor:
+        return GradientBoostingRegressor(n_estimators=50, max_depth=3, warm_start=True)
+    
+    @staticmethod
+    def _new_online_model() -> SGDRegressor:
+        return SGDRegressor(alpha=1e-4, eta0=0.01, learning_rate='invscaling', random_state=0)
+    
+    def train(self, base_features: np.array, labels: np.array, progress: Optional[Callable[[float], None]] = None):
+        """Train adapter with domain-specific data; `progress` gets the fraction of boosting stages done"""
+        base_features = np.asarray(base_features, dtype=np.float64)
+        labels = np.asarray(labels, dtype=np.float64)
+        # A full fit's rows become the kept history
+        self.history_features = np.ascontiguousarray(base_features[-self.max_history:], dtype=np.float32)
+        self.history_labels = np.ascontiguousarray(labels[-self.max_history:], dtype=np.float32)
+        self.rows_seen = max(self.rows_seen, len(base_features))
+        self.rows_at_refit = len(base_features)
+        self.rows_since_refit = 0
+        self.updates_since_refit = 0
+        
+        if len(base_features) < 10:
+            # Not enough data, use identity mapping
+            self.is_trained = False
+            return
+        
+        # Scale features
+        self.scaler = StandardScaler()
+        base_features_scaled = self.scaler.fit_transform(base_features)
+        
+        # Train
+        self.model = self._new_model()
+        n_stages = self.model.n_estimators
+        
+        def report_stage(stage, estimator, local_vars):
+            progress((stage + 1) / n_stages)
+            return False  # True would stop boosting early
+        self.model.fit(base_features_scaled, labels, monitor=report_stage if progress is not None else None)
+        if self.incremental:
+            self.online_scaler = StandardScaler()
+            self.online_model = self._new_online_model()
+            self.online_model.fit(self.online_scaler.fit_transform(base_features), labels)
+        self.is_trained = True
+    
+    def update(self, base_features: np.array, labels: np.array):
+        """Fold new labeled rows into the adapter (trains from the kept history until trained)"""
+        base_features = np.asarray(base_features, dtype=np.float64)
+        labels = np.asarray(labels, dtype=np.float64)
+        if len(base_features) == 0:
+            return
+        if not self.is_trained:
+            self.remember(base_features, labels)
+            self.train(self.history_features, self.history_labels)
+            return
+        
+        self.remember(base_features, labels)
+        self._own_arrays()
+        
+        # Extra boosting stages start from the current ensemble's predictions on the window
+        window_features, window_labels = self.recent_history(max(self.update_window, len(base_features)))
+        self.model.warm_start = True
+        self.model.n_estimators = len(self.model.estimators_) + self.stages_per_update
+        self.model.fit(self.scaler.transform(window_features), window_labels)
+        if self.online_model is not None:
+            self.online_scaler.partial_fit(base_features)
+            self.online_model.partial_fit(self.online_scaler.transform(base_features), labels)
+        
+        self.rows_since_refit += len(base_features)
+        self.updates_since_refit += 1
+    
+    def _own_arrays(self):
+        """Copy learned arrays that are read-only memory maps (loaded adapters) before in-place updates"""
+        for estimator in (self.online_scaler, self.online_model):
+            if estimator is None:
+                continue
+            for name, value in list(vars(estimator).items()):
+                if isinstance(value, np.ndarray) and not value.flags.writeable:
+                    setattr(estimator, name, np.array(value))
+    
+    def needs_refit(self, refit_every: int = 50) -> bool:
+        """True once the rows added since the last full fit match the rows it saw, or after `refit_every` updates"""
+        if not self.is_trained:
+            return False
+        return self.rows_since_refit >= max(self.rows_at_refit, 100) or self.updates_since_refit >= refit_every
+    
+    def remember(self, base_features: np.ndarray, labels: np.ndarray):
+        """Append rows to the kept history (new arrays; loaded ones may be read-only memory maps)"""
+        self.rows_seen += len(base_features)
+        if self.history_features is None or self.history_features.shape[1:] != base_features.shape[1:]:
+            features, targets = base_features, labels
+        else:
+            features = np.concatenate([self.history_features, base_features])
+            targets = np.concatenate([self.history_labels, labels])
+        self.history_features = np.ascontiguousarray(features[-self.max_history:], dtype=np.float32)
+        self.history_labels = np.ascontiguousarray(targets[-self.max_history:], dtype=np.float32)
+    
+    def recent_history(self, rows: int):
+        """The last `rows` kept rows (features, labels)"""
+        rows = min(rows, 0 if self.history_labels is None else len(self.history_labels))
+        if rows == 0:
+            return np.empty((0, 0)), np.empty(0)
+        return self.history_features[-rows:], self.history_labels[-rows:]
+    
+    def adjust(self, base_prediction: float, base_features: np.array) -> float:
+        """Adjust base prediction for this domain"""
+        if not self.is_trained:
+            return base_prediction
+        
+        # Scale features
+        features_scaled = self.scaler.transform([base_features])[0]
+        
+        # Predict adjustment
+        adjustment = self.model.predict([features_scaled])[0]
+        if self.online_model is not None:
+            online_scaled = self.online_scaler.transform([base_features])
+            adjustment = (adjustment + self.online_model.predict(online_scaled)[0]) / 2.0
+        
+        # Combine: base + adjustment
+        adjusted = base_prediction * 0.7 + adjustment * 0.3
+        
+        return np.clip(adjusted, 0.0, 1.0)
+    
+    def adjust_batch(self, base_predictions: np.array, base_features: np.array) -> np.ndarray:
+        """adjust() for every row of a feature matrix, with one scaler / model call"""
+        base_predictions = np.asarray(base_predictions, dtype=np.float64)
+        if not self.is_trained:
+            return base_predictions
+        
+        features_scaled = self.scaler.transform(base_features)
+        adjustments = self.model.predict(features_scaled)
+        if self.online_model is not None:
+            online_scaled = self.online_scaler.transform(base_features)
+            adjustments = (adjustments + self.online_model.predict(online_scaled)) / 2.0
+        
+        return np.clip(base_predictions * 0.7 + adjustments * 0.3, 0.0, 1.0)
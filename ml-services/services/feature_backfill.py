@@ -0,0 +1,180 @@
+"""
+Feature Backfill
+Point-in-time feature rows for historical events, built in a single pass.
+
+For every event and every snapshot offset (e.g. 48h, 24h, 1h before kickoff) a
+row of ADVANCED_FEATURE_SCHEMA features is produced as it would have looked at
+the snapshot time. All snapshots are processed in time order while finished
+results are fed into a TeamFormIndex, a MatchResultsStore and EloRatings as they
+become available, and each event's odds ticks are cut at the snapshot with a binary
+search. Nothing from after the snapshot is visible:
+- a result counts only once kickoff + result_delay is strictly before the snapshot
+- an odds tick counts only if its timestamp is at or before the snapshot
+With `bar_interval` the odds indicators are computed on fixed-interval bars
+(see odds_resampler) ending at the snapshot instead of on raw ticks.
+Results and events without a kickoff time cannot be placed in time and are skipped.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+from services.advanced_feature_engineering import AdvancedFeatureEngineering, ADVANCED_FEATURE_SCHEMA
+from services.feature_schema import FeatureSchema
+from services.match_results_store import MatchResultsStore, to_datetime64
+from services.odds_resampler import resample_ticks
+from services.team_form_index import TeamFormIndex
+from services.team_ratings import EloRatings
+
+DEFAULT_OFFSETS_HOURS = (48.0, 24.0, 6.0, 1.0)
+
+def _event_id(event: Dict) -> str:
+    return str(event.get('id') or event.get('eventId') or '')
+
+def _result_time(result: Dict):
+    return result.get('date') or result.get('startTime')
+
+class OddsTimeline:
+    """
+    Time-sorted odds ticks of one event
+    Ticks are dicts with 'timestamp', 'odds' and optionally 'bookmaker'
+    """
+    
+    def __init__(self, ticks: Sequence[Dict]):
+        times = np.array([to_datetime64(tick.get('timestamp')) for tick in ticks], dtype='datetime64[s]')
+        order = np.argsort(times, kind='stable')
+        valid = order[~np.isnat(times[order])]
+        self.times = times[valid]
+        self.odds = np.array([float(ticks[i]['odds']) for i in valid], dtype=np.float64)
+        bookmakers = [str(ticks[i].get('bookmaker', '')) for i in valid]
+        self.bookmakers, self.bookmaker_codes = np.unique(np.array(bookmakers, dtype=str), return_inverse=True)
+    
+    def cut(self, snapshot: np.datetime64) -> int:
+        """Number of ticks at or before the snapshot"""
+        return int(np.searchsorted(self.times, snapshot, side='right'))
+    
+    def history(self, snapshot: np.datetime64) -> np.ndarray:
+        """Odds history as of the snapshot"""
+        return self.odds[:self.cut(snapshot)]
+    
+    def latest_by_bookmaker(self, snapshot: np.datetime64) -> np.ndarray:
+        """Most recent odds of every bookmaker as of the snapshot (ordered by bookmaker)"""
+        n = self.cut(snapshot)
+        if n == 0:
+            return self.odds[:0]
+        # First occurrence in the reversed prefix = latest tick per bookmaker
+        _, first = np.unique(self.bookmaker_codes[:n][::-1], return_index=True)
+        return self.odds[:n][::-1][first]
+
+class BackfillResult:
+    """Backfilled rows with the event, offset and snapshot time of each row"""
+    
+    def __init__(self, matrix: np.ndarray, event_ids: np.ndarray, offsets_hours: np.ndarray,
+                 snapshot_times: np.ndarray, schema: FeatureSchema):
+        self.matrix = matrix
+        self.event_ids = event_ids
+        self.offsets_hours = offsets_hours
+        self.snapshot_times = snapshot_times
+        self.schema = schema
+    
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+class FeatureBackfill:
+    """
+    Single-pass, leakage-free point-in-time feature backfill
+    """
+    
+    def __init__(self,
+                 feature_engineer: Optional[AdvancedFeatureEngineering] = None,
+                 schema: FeatureSchema = ADVANCED_FEATURE_SCHEMA,
+                 result_delay: timedelta = timedelta(hours=2),
+                 bar_interval: Optional[Union[str, int]] = None):
+        self.feature_engineer = feature_engineer or AdvancedFeatureEngineering()
+        self.schema = schema
+        self.result_delay = np.timedelta64(int(result_delay.total_seconds()), 's')
+        self.bar_interval = bar_interval
+    
+    def run(self,
+            events: Sequence[Dict],
+            results: Sequence[Dict],
+            odds_ticks: Optional[Dict[str, Sequence[Dict]]] = None,
+            offsets_hours: Sequence[float] = DEFAULT_OFFSETS_HOURS) -> BackfillResult:
+        """
+        Rows for every (event, offset), ordered by event kickoff and then by offset
+        `odds_ticks` maps event id -> odds ticks of that event
+        """
+        odds_ticks = odds_ticks or {}
+        offsets_hours = [float(hours) for hours in offsets_hours]
+        
+        # Events in kickoff order; those without a kickoff are skipped
+        placed: List[Tuple[np.datetime64, datetime, Dict]] = []
+        for event in events:
+            start_time = event.get('startTime')
+            if not start_time:
+                continue
+            if isinstance(start_time, str):
+                start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+            placed.append((to_datetime64(start_time), start_time, event))
+        placed.sort(key=lambda item: item[0])
+        
+        n_rows = len(placed) * len(offsets_hours)
+        matrix = self.schema.empty_matrix(n_rows)
+        event_ids = np.empty(n_rows, dtype=object)
+        row_offsets = np.empty(n_rows, dtype=np.float64)
+        snapshot_times = np.empty(n_rows, dtype='datetime64[s]')
+        
+        for i, (kickoff, _, event) in enumerate(placed):
+            for j, hours in enumerate(offsets_hours):
+                row = i * len(offsets_hours) + j
+                event_ids[row] = _event_id(event)
+                row_offsets[row] = hours
+                snapshot_times[row] = kickoff - np.timedelta64(int(round(hours * 3600)), 's')
+        
+        # Results in the order they become known
+        known = [(to_datetime64(_result_time(result)), result) for result in results]
+        known = sorted(((kickoff + self.result_delay, result) for kickoff, result in known if not np.isnat(kickoff)),
+                       key=lambda item: item[0])
+        
+        form_index = TeamFormIndex()
+        results_store = MatchResultsStore(capacity=max(len(known), 1))
+        ratings = EloRatings()
+        timelines: Dict[int, OddsTimeline] = {}
+        odds_histories: List = [np.empty(0)] * n_rows
+        
+        next_result = 0
+        for row in np.argsort(snapshot_times, kind='stable'):
+            snapshot = snapshot_times[row]
+            while next_result < len(known) and known[next_result][0] < snapshot:
+                result = known[next_result][1]
+                form_index.ingest(result)
+                results_store.append(result)
+                ratings.ingest(result)
+                next_result += 1
+            
+            position = row // len(offsets_hours)
+            _, start_time, event = placed[position]
+            timeline = timelines.get(position)
+            if timeline is None:
+                timeline = timelines[position] = OddsTimeline(odds_ticks.get(event_ids[row], ()))
+            if self.bar_interval is None:
+                odds_histories[row] = timeline.history(snapshot)
+            else:
+                odds_histories[row] = resample_ticks(timeline.times, timeline.odds, self.bar_interval, end=snapshot)
+            
+            self.feature_engineer.create_feature_vector(
+                event,
+                odds_history=[],
+                all_odds=list(timeline.latest_by_bookmaker(snapshot)),
+                prediction_time=start_time - timedelta(hours=row_offsets[row]),
+                technical_features={},  # Filled for all rows in one batch below
+                form_index=form_index,
+                results_store=results_store,
+                ratings=ratings,
+                out=matrix[row],
+                schema=self.schema,
+            )
+        
+        if n_rows:
+            self.feature_engineer.write_technical_columns(matrix, np.arange(n_rows), odds_histories, self.schema)
+        
+        return BackfillResult(matrix, event_ids.astype(str), row_offsets, snapshot_times, self.schema)
@@ -0,0 +1,158 @@
+"""
+Feature Cache
+Bounded, content-addressed cache for AdvancedFeatureEngineering.create_all_features
+Entries are keyed by a hash of the inputs and evicted by LRU, TTL and a memory cap
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import sys
+import threading
+import time
+import numpy as np
+
+# Result fields that the form / h2h features read
+RESULT_DIGEST_FIELDS = ('homeTeam', 'awayTeam', 'homeScore', 'awayScore', 'is_home')
+
+# Event fields that the contextual features read
+EVENT_DIGEST_FIELDS = ('id', 'eventId', 'homeTeam', 'awayTeam', 'startTime', 'importance')
+
+def make_feature_key(event: Dict,
+                     odds_history: List[float],
+                     all_odds: List[float],
+                     team1_form: Optional[List[Dict]] = None,
+                     team2_form: Optional[List[Dict]] = None,
+                     h2h_history: Optional[List[Dict]] = None,
+                     prediction_time: Optional[datetime] = None,
+                     technical_features: Optional[Dict[str, float]] = None,
+                     time_bucket_seconds: int = 300,
+                     extra: Optional[Tuple] = None) -> str:
+    """
+    Fast content hash of create_all_features inputs
+    Prediction time is bucketed, so requests within the same bucket share an entry
+    `extra` carries any other state the features depend on (e.g. index versions)
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(tuple(event.get(field) for field in EVENT_DIGEST_FIELDS)).encode())
+    digest.update(b'|odds|')
+    digest.update(np.asarray(odds_history if odds_history else [], dtype=np.float64).tobytes())
+    digest.update(b'|all_odds|')
+    digest.update(np.asarray(all_odds if all_odds else [], dtype=np.float64).tobytes())
+    for name, results in (('team1', team1_form), ('team2', team2_form), ('h2h', h2h_history)):
+        digest.update(f'|{name}|'.encode())
+        digest.update(_results_digest(results))
+    if technical_features is not None:
+        digest.update(b'|technical|')
+        digest.update(repr(sorted(technical_features.items())).encode())
+    if extra is not None:
+        digest.update(f'|extra|{extra!r}'.encode())
+    if prediction_time is not None:
+        digest.update(f'|t|{int(prediction_time.timestamp() // time_bucket_seconds)}'.encode())
+    return digest.hexdigest()
+
+def _results_digest(results: Optional[List[Dict]]) -> bytes:
+    """Digest of the fields the feature code reads from a results list"""
+    if not results:
+        return b''
+    rows = tuple(tuple(r.get(field) for field in RESULT_DIGEST_FIELDS) for r in results)
+    return hashlib.blake2b(repr(rows).encode(), digest_size=16).digest()
+
+def _estimate_size(features: Dict[str, float]) -> int:
+    """Approximate memory held by a cached feature dict"""
+    size = sys.getsizeof(features)
+    for key, value in features.items():
+        size += sys.getsizeof(key) + sys.getsizeof(value)
+    return size
+
+class FeatureCache:
+    """
+    LRU + TTL cache of feature dicts with a memory cap
+    Thread-safe; counters are exposed through stats()
+    """
+    
+    def __init__(self,
+                 max_entries: int = 10000,
+                 ttl_seconds: float = 900.0,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 time_bucket_seconds: int = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.time_bucket_seconds = time_bucket_seconds
+        
+        # key -> (expires_at, size_bytes, features)
+        self._entries: 'OrderedDict[str, Tuple[float, int, Dict[str, float]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def make_key(self, *args, **kwargs) -> str:
+        kwargs.setdefault('time_bucket_seconds', self.time_bucket_seconds)
+        return make_feature_key(*args, **kwargs)
+    
+    def get(self, key: str) -> Optional[Dict[str, float]]:
+        """Return a copy of the cached features, or None on miss/expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            expires_at, _, features = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(features)
+    
+    def set(self, key: str, features: Dict[str, float]):
+        """Store a copy of the features, evicting least recently used entries as needed"""
+        features = dict(features)
+        size = _estimate_size(features)
+        if size > self.max_bytes:
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, features)
+            self.current_bytes += size
+            
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+    
+    def stats(self) -> Dict[str, float]:
+        """Counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+    
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
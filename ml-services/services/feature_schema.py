@@ -0,0 +1,65 @@
+"""
+Feature Schema
+Ordered feature name -> column index registry with a schema hash.
+Lets feature code write straight into preallocated float32 rows / matrices,
+and makes train/serve mismatches detectable by comparing hashes.
+"""
+from typing import Dict, Iterable, Optional, Tuple
+import hashlib
+import numpy as np
+
+class FeatureSchema:
+    """
+    Declared, ordered set of feature columns
+    """
+    
+    def __init__(self, names: Iterable[str], dtype=np.float32):
+        self.names: Tuple[str, ...] = tuple(names)
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        if len(self.index) != len(self.names):
+            duplicates = sorted({name for name in self.names if self.names.count(name) > 1})
+            raise ValueError(f"Duplicate feature names in schema: {duplicates}")
+        self.dtype = np.dtype(dtype)
+        self.schema_hash = hashlib.sha256('\n'.join(self.names).encode()).hexdigest()[:16]
+        # (prefix, key) -> column, so prefixed blocks need no string formatting per feature
+        self._prefixed: Dict[Tuple[str, str], int] = {}
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+    
+    def column(self, key: str, prefix: str = '') -> Optional[int]:
+        """Column of `prefix + key`, or None if not in the schema"""
+        column = self._prefixed.get((prefix, key))
+        if column is None:
+            column = self.index.get(prefix + key)
+            if column is not None:
+                self._prefixed[(prefix, key)] = column
+        return column
+    
+    def empty_row(self, fill_value: float = np.nan) -> np.ndarray:
+        return np.full(len(self.names), fill_value, dtype=self.dtype)
+    
+    def empty_matrix(self, n_rows: int, fill_value: float = np.nan) -> np.ndarray:
+        return np.full((n_rows, len(self.names)), fill_value, dtype=self.dtype)
+    
+    def write(self, features: Dict[str, float], out: np.ndarray, prefix: str = '') -> np.ndarray:
+        """Write a feature dict into a row; keys outside the schema are ignored"""
+        for key, value in features.items():
+            column = self.column(key, prefix)
+            if column is not None:
+                out[column] = value
+        return out
+    
+    def to_dict(self, row: np.ndarray) -> Dict[str, float]:
+        """Row -> {name: value}, skipping NaN (missing) features"""
+        return {name: float(value) for name, value in zip(self.names, row) if not np.isnan(value)}
+    
+    def check(self, schema_hash: Optional[str]):
+        """Raise if data produced under another schema is used with this one"""
+        if schema_hash is not None and schema_hash != self.schema_hash:
+            raise ValueError(
+                f"Feature schema mismatch: expected {self.schema_hash}, got {schema_hash}"
+            )
@@ -0,0 +1,345 @@
+"""
+Feature Store
+Local, file-based store of computed feature matrices.
+
+Layout:
+    <root>/<schema_hash>/<code_version>/sport=<sport>/date=<YYYY-MM-DD>/
+        CURRENT        name of the current version directory
+        v<n>/
+            features.npy   float32, stored column-major (n_features x n_rows)
+            labels.npy     optional float32 labels (n_rows)
+            row_ids.npy    optional event ids (n_rows, unicode)
+            meta.json      schema, code version, row count, source digest
+
+A rewrite goes to a new version directory and CURRENT is then replaced with
+os.replace, so readers resolve either the old or the new version, never neither.
+The previous version is kept until the next write for readers that resolved it
+just before the switch. Partitions written before versioning (files directly in
+the date directory) are still read.
+
+Partitions are memory-mapped on read. Because each feature column is contiguous on
+disk, projecting a few columns only touches the pages of those columns, and row
+predicates are evaluated on the projected columns before anything else is read.
+A partition is stale when the schema hash or code version differs (it then simply
+lives under another directory) or when the caller's source digest of the raw
+inputs changed; ensure() recomputes only missing or stale partitions.
+"""
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+import hashlib
+import json
+import operator
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from services.advanced_feature_engineering import ADVANCED_FEATURE_SCHEMA
+from services.feature_schema import FeatureSchema
+
+FEATURES_FILE = 'features.npy'
+LABELS_FILE = 'labels.npy'
+ROW_IDS_FILE = 'row_ids.npy'
+META_FILE = 'meta.json'
+CURRENT_FILE = 'CURRENT'
+
+# Source files whose content defines the feature values
+FEATURE_CODE_FILES = (
+    'advanced_feature_engineering.py',
+    'feature_schema.py',
+    'match_results_store.py',
+    'odds_resampler.py',
+    'streaming_stats.py',
+    'team_form_index.py',
+    'team_ratings.py',
+    'team_strength.py',
+)
+
+PREDICATE_OPS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+Predicate = Tuple[str, str, float]
+PartitionKey = Tuple[str, str]
+
+def feature_code_version(files: Sequence[str] = FEATURE_CODE_FILES) -> str:
+    """Hash of the feature code, so partitions built by older code are never read"""
+    digest = hashlib.sha256()
+    services_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in files:
+        digest.update(name.encode())
+        with open(os.path.join(services_dir, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+def _partition_date(value: Union[str, date, datetime]) -> str:
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.isoformat()
+    return date.fromisoformat(value[:10]).isoformat()
+
+class FeatureFrame:
+    """Result of a store read: a feature matrix with its column names, labels and row ids"""
+    
+    def __init__(self, matrix: np.ndarray, columns: Sequence[str], labels: Optional[np.ndarray] = None,
+                 row_ids: Optional[np.ndarray] = None, partitions: Optional[np.ndarray] = None):
+        self.matrix = matrix
+        self.columns = list(columns)
+        self.labels = labels
+        self.row_ids = row_ids
+        self.partitions = partitions  # Index into the read partition list, per row
+    
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+class FeatureStore:
+    """
+    Persisted feature matrices partitioned by sport and date
+    """
+    
+    def __init__(self, root: str, schema: FeatureSchema = ADVANCED_FEATURE_SCHEMA, code_version: Optional[str] = None):
+        self.root = root
+        self.schema = schema
+        self.code_version = code_version or feature_code_version()
+        self.base_dir = os.path.join(root, schema.schema_hash, self.code_version)
+    
+    def partition_path(self, sport: str, day: Union[str, date, datetime]) -> str:
+        return os.path.join(self.base_dir, f'sport={sport}', f'date={_partition_date(day)}')
+    
+    def partitions(self,
+                   sports: Optional[Iterable[str]] = None,
+                   start: Optional[Union[str, date, datetime]] = None,
+                   end: Optional[Union[str, date, datetime]] = None) -> List[PartitionKey]:
+        """
+        (sport, date) of stored partitions, pruned by sport and by date range
+        (start and end inclusive) from directory names alone
+        """
+        if not os.path.isdir(self.base_dir):
+            return []
+        sports = set(sports) if sports is not None else None
+        start = _partition_date(start) if start is not None else None
+        end = _partition_date(end) if end is not None else None
+        
+        found = []
+        for sport_dir in sorted(os.listdir(self.base_dir)):
+            if not sport_dir.startswith('sport='):
+                continue
+            sport = sport_dir[len('sport='):]
+            if sports is not None and sport not in sports:
+                continue
+            for date_dir in sorted(os.listdir(os.path.join(self.base_dir, sport_dir))):
+                if not date_dir.startswith('date='):
+                    continue
+                day = date_dir[len('date='):]
+                if (start is not None and day < start) or (end is not None and day > end):
+                    continue
+                partition_dir = os.path.join(self.base_dir, sport_dir, date_dir)
+                if os.path.exists(os.path.join(partition_dir, CURRENT_FILE)) or os.path.exists(os.path.join(partition_dir, META_FILE)):
+                    found.append((sport, day))
+        return found
+    
+    def current_dir(self, sport: str, day: Union[str, date, datetime]) -> Optional[str]:
+        """Directory holding the partition's current version, None when absent"""
+        path = self.partition_path(sport, day)
+        try:
+            with open(os.path.join(path, CURRENT_FILE)) as f:
+                return os.path.join(path, f.read().strip())
+        except OSError:
+            pass
+        # Partitions written before versioning keep their files in the date directory
+        return path if os.path.exists(os.path.join(path, META_FILE)) else None
+    
+    def metadata(self, sport: str, day: Union[str, date, datetime]) -> Optional[Dict]:
+        version_dir = self.current_dir(sport, day)
+        if version_dir is None:
+            return None
+        try:
+            with open(os.path.join(version_dir, META_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def is_fresh(self, sport: str, day: Union[str, date, datetime], source_digest: Optional[str] = None) -> bool:
+        """True when the partition exists, matches this schema/code and (if given) the source digest"""
+        meta = self.metadata(sport, day)
+        if meta is None:
+            return False
+        if meta.get('schema_hash') != self.schema.schema_hash or meta.get('code_version') != self.code_version:
+            return False
+        return source_digest is None or meta.get('source_digest') == source_digest
+    
+    def write_partition(self,
+                        sport: str,
+                        day: Union[str, date, datetime],
+                        matrix: np.ndarray,
+                        labels: Optional[np.ndarray] = None,
+                        row_ids: Optional[Sequence[str]] = None,
+                        source_digest: Optional[str] = None):
+        """Persist one partition (n_rows x n_features); replaces any previous version atomically"""
+        matrix = np.asarray(matrix, dtype=self.schema.dtype)
+        if matrix.ndim != 2 or matrix.shape[1] != len(self.schema):
+            raise ValueError(f"Expected a (n_rows, {len(self.schema)}) matrix, got {matrix.shape}")
+        n_rows = matrix.shape[0]
+        
+        path = self.partition_path(sport, day)
+        os.makedirs(path, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=path)
+        try:
+            np.save(os.path.join(staging, FEATURES_FILE), np.ascontiguousarray(matrix.T))
+            if labels is not None:
+                labels = np.asarray(labels, dtype=np.float32)
+                if labels.shape != (n_rows,):
+                    raise ValueError(f"Expected {n_rows} labels, got {labels.shape}")
+                np.save(os.path.join(staging, LABELS_FILE), labels)
+            if row_ids is not None:
+                row_ids = np.asarray([str(row_id) for row_id in row_ids])
+                if row_ids.shape != (n_rows,):
+                    raise ValueError(f"Expected {n_rows} row ids, got {row_ids.shape}")
+                np.save(os.path.join(staging, ROW_IDS_FILE), row_ids)
+            with open(os.path.join(staging, META_FILE), 'w') as f:
+                json.dump({
+                    'schema_hash': self.schema.schema_hash,
+                    'code_version': self.code_version,
+                    'columns': list(self.schema.names),
+                    'rows': n_rows,
+                    'source_digest': source_digest,
+                    'created_at': datetime.now().isoformat(),
+                }, f)
+            
+            versions = self._versions(path)
+            version = (versions[-1] if versions else 0) + 1
+            os.rename(staging, os.path.join(path, f'v{version}'))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        
+        # Point CURRENT at the new version atomically; readers see the old or the new one
+        fd, pointer = tempfile.mkstemp(prefix='.current-', dir=path)
+        with os.fdopen(fd, 'w') as f:
+            f.write(f'v{version}')
+        os.replace(pointer, os.path.join(path, CURRENT_FILE))
+        self._prune(path, version)
+    
+    @staticmethod
+    def _versions(path: str) -> List[int]:
+        return sorted(int(name[1:]) for name in os.listdir(path) if name.startswith('v') and name[1:].isdigit())
+    
+    def _prune(self, path: str, current: int):
+        """Remove versions older than the previous one (which readers may still be using)"""
+        older = [version for version in self._versions(path) if version < current]
+        for version in older[:-1]:
+            shutil.rmtree(os.path.join(path, f'v{version}'), ignore_errors=True)
+        if older:
+            # Files of a pre-versioning partition count as the version before v1
+            for name in (FEATURES_FILE, LABELS_FILE, ROW_IDS_FILE, META_FILE):
+                if os.path.exists(os.path.join(path, name)):
+                    os.remove(os.path.join(path, name))
+    
+    def read_partition(self,
+                       sport: str,
+                       day: Union[str, date, datetime],
+                       columns: Optional[Sequence[str]] = None,
+                       where: Optional[Sequence[Predicate]] = None) -> FeatureFrame:
+        """
+        Read one partition, projecting `columns` (default: all) and keeping only rows
+        matching every (column, op, value) predicate in `where`
+        """
+        columns = list(columns) if columns is not None else list(self.schema.names)
+        for attempt in range(3):
+            path = self.current_dir(sport, day)  # Resolved once, so all files come from one version
+            if path is None:
+                raise FileNotFoundError(f"No feature partition for sport={sport} date={_partition_date(day)}")
+            try:
+                return self._read_version(path, columns, where)
+            except FileNotFoundError:
+                # Newer writes pruned the version after it was resolved; read the current one
+                if attempt == 2 or self.current_dir(sport, day) == path:
+                    raise
+    
+    def _read_version(self, path: str, columns: List[str], where: Optional[Sequence[Predicate]]) -> FeatureFrame:
+        present = set(os.listdir(path))
+        stored = np.load(os.path.join(path, FEATURES_FILE), mmap_mode='r')  # (n_features, n_rows)
+        
+        mask = self._row_mask(stored, where)
+        rows = np.nonzero(mask)[0] if mask is not None else slice(None)
+        
+        matrix = np.empty((stored.shape[1] if mask is None else len(rows), len(columns)), dtype=self.schema.dtype)
+        for j, name in enumerate(columns):
+            matrix[:, j] = stored[self._column(name)][rows]
+        
+        labels = self._load_optional(path, LABELS_FILE, rows, present)
+        row_ids = self._load_optional(path, ROW_IDS_FILE, rows, present)
+        return FeatureFrame(matrix, columns, labels, row_ids)
+    
+    def read(self,
+             sports: Optional[Iterable[str]] = None,
+             start: Optional[Union[str, date, datetime]] = None,
+             end: Optional[Union[str, date, datetime]] = None,
+             columns: Optional[Sequence[str]] = None,
+             where: Optional[Sequence[Predicate]] = None) -> Tuple[FeatureFrame, List[PartitionKey]]:
+        """
+        Concatenated read over the partitions selected by sport and date range
+        Returns the frame and the partition list that its `partitions` column indexes
+        """
+        keys = self.partitions(sports, start, end)
+        columns = list(columns) if columns is not None else list(self.schema.names)
+        frames = [self.read_partition(sport, day, columns, where) for sport, day in keys]
+        
+        if not frames:
+            return FeatureFrame(np.empty((0, len(columns)), dtype=self.schema.dtype), columns), keys
+        
+        matrix = np.concatenate([frame.matrix for frame in frames])
+        partitions = np.concatenate([np.full(len(frame), i, dtype=np.int32) for i, frame in enumerate(frames)])
+        labels = None
+        if all(frame.labels is not None for frame in frames):
+            labels = np.concatenate([frame.labels for frame in frames])
+        row_ids = None
+        if all(frame.row_ids is not None for frame in frames):
+            row_ids = np.concatenate([frame.row_ids for frame in frames])
+        return FeatureFrame(matrix, columns, labels, row_ids, partitions), keys
+    
+    def ensure(self,
+               sport: str,
+               day: Union[str, date, datetime],
+               build: Callable[[], Tuple[np.ndarray, Optional[np.ndarray], Optional[Sequence[str]]]],
+               source_digest: Optional[str] = None) -> bool:
+        """
+        Recompute a partition only when it is missing or stale
+        `build` returns (matrix, labels, row_ids); returns True if it was called
+        """
+        if self.is_fresh(sport, day, source_digest):
+            return False
+        matrix, labels, row_ids = build()
+        self.write_partition(sport, day, matrix, labels, row_ids, source_digest)
+        return True
+    
+    def _column(self, name: str) -> int:
+        column = self.schema.column(name)
+        if column is None:
+            raise KeyError(f"Unknown feature column: {name}")
+        return column
+    
+    def _row_mask(self, stored: np.ndarray, where: Optional[Sequence[Predicate]]) -> Optional[np.ndarray]:
+        """Evaluate predicates column by column on the memory-mapped partition"""
+        if not where:
+            return None
+        mask = np.ones(stored.shape[1], dtype=bool)
+        for name, op, value in where:
+            compare = PREDICATE_OPS.get(op)
+            if compare is None:
+                raise ValueError(f"Unsupported predicate operator: {op}")
+            mask &= compare(stored[self._column(name)], value)
+        return mask
+    
+    @staticmethod
+    def _load_optional(path: str, name: str, rows, present: Set[str]) -> Optional[np.ndarray]:
+        """A file listed in `present` (the version's files); a listed file that is gone raises FileNotFoundError"""
+        if name not in present:
+            return None
+        return np.asarray(np.load(os.path.join(path, name), mmap_mode='r')[rows])
@@ -0,0 +1,273 @@
+"""
+Incremental Technical Indicators
+Keeps technical indicator state per selection for live odds streams,
+so every new odds tick is an O(1) update instead of a full recalculation.
+
+Produces the same feature dict as AdvancedFeatureEngineering.calculate_technical_indicators
+(and can be passed to create_all_features as `technical_features`), with one
+deliberate difference from its formulas: RSI uses Wilder smoothing instead of
+a plain mean of the last 14 deltas.
+"""
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Tuple
+import math
+
+class MonotonicWindow:
+    """
+    Sliding-window min/max over the last `size` values
+    Uses monotonic deques: amortized O(1) per push
+    """
+    
+    def __init__(self, size: int):
+        self.size = size
+        self.count = 0
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._max: Deque[Tuple[int, float]] = deque()
+    
+    def push(self, value: float):
+        """Add a value, expiring the one that leaves the window"""
+        index = self.count
+        self.count += 1
+        
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((index, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((index, value))
+        
+        expired = index - self.size
+        if self._min[0][0] <= expired:
+            self._min.popleft()
+        if self._max[0][0] <= expired:
+            self._max.popleft()
+    
+    @property
+    def min(self) -> float:
+        return self._min[0][1]
+    
+    @property
+    def max(self) -> float:
+        return self._max[0][1]
+
+class RollingMoments:
+    """
+    Mean and population variance over the last `size` values
+    Welford updates, with the value leaving the window removed in the same step
+    """
+    
+    def __init__(self, size: int):
+        self.size = size
+        self.values: Deque[float] = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+    
+    def push(self, value: float):
+        if len(self.values) < self.size:
+            self.values.append(value)
+            delta = value - self.mean
+            self.mean += delta / len(self.values)
+            self.m2 += delta * (value - self.mean)
+        else:
+            old = self.values.popleft()
+            self.values.append(value)
+            old_mean = self.mean
+            self.mean += (value - old) / self.size
+            self.m2 += (value - old) * (value - self.mean + old - old_mean)
+        self.m2 = max(self.m2, 0.0)
+    
+    @property
+    def std(self) -> float:
+        if not self.values:
+            return 0.0
+        return math.sqrt(self.m2 / len(self.values))
+
+class IncrementalIndicators:
+    """
+    Stateful technical indicators for one selection's odds stream
+    Call update() with each new odds tick, features() to read the current values
+    """
+    
+    def __init__(self,
+                 rsi_period: int = 14,
+                 macd_fast: int = 12,
+                 macd_slow: int = 26,
+                 macd_signal: int = 9,
+                 bollinger_period: int = 20,
+                 bollinger_std: float = 2.0,
+                 momentum_period: int = 14,
+                 stochastic_period: int = 14,
+                 support_resistance_period: int = 20):
+        # Constructor arguments, so derived instances use the same windows
+        self._config = {
+            'rsi_period': rsi_period,
+            'macd_fast': macd_fast,
+            'macd_slow': macd_slow,
+            'macd_signal': macd_signal,
+            'bollinger_period': bollinger_period,
+            'bollinger_std': bollinger_std,
+            'momentum_period': momentum_period,
+            'stochastic_period': stochastic_period,
+            'support_resistance_period': support_resistance_period,
+        }
+        self.rsi_period = rsi_period
+        self.macd_slow = macd_slow
+        self.bollinger_std = bollinger_std
+        
+        self._fast_multiplier = 2.0 / (macd_fast + 1)
+        self._slow_multiplier = 2.0 / (macd_slow + 1)
+        self._signal_multiplier = 2.0 / (macd_signal + 1)
+        
+        self.tick_count = 0  # All ticks, including invalid odds
+        self.price_count = 0  # Valid ticks (odds > 0)
+        self.last_price: Optional[float] = None
+        
+        # RSI (Wilder smoothing)
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        
+        # EMA / MACD
+        self._ema_fast = 0.0
+        self._ema_slow = 0.0
+        self._signal = 0.0
+        
+        self._bollinger = RollingMoments(bollinger_period)
+        self._momentum: Deque[float] = deque(maxlen=momentum_period + 1)
+        self._stochastic = MonotonicWindow(stochastic_period)
+        self._support_resistance = MonotonicWindow(support_resistance_period)
+    
+    @classmethod
+    def from_history(cls, odds_history: Iterable[float], **kwargs) -> 'IncrementalIndicators':
+        """Build state by replaying an existing odds history"""
+        indicators = cls(**kwargs)
+        indicators.extend(odds_history)
+        return indicators
+    
+    def extend(self, odds: Iterable[float]):
+        for odd in odds:
+            self.update(odd)
+    
+    def update(self, odd: float):
+        """Process one odds tick in O(1)"""
+        self.tick_count += 1
+        if not odd > 0:
+            return
+        price = 1.0 / odd
+        
+        if self.last_price is None:
+            self._ema_fast = price
+            self._ema_slow = price
+        else:
+            self._update_rsi(price - self.last_price)
+            self._ema_fast = (price * self._fast_multiplier) + (self._ema_fast * (1 - self._fast_multiplier))
+            self._ema_slow = (price * self._slow_multiplier) + (self._ema_slow * (1 - self._slow_multiplier))
+            macd_line = self._ema_fast - self._ema_slow
+            self._signal = (macd_line * self._signal_multiplier) + (self._signal * (1 - self._signal_multiplier))
+        
+        self.price_count += 1
+        self.last_price = price
+        self._bollinger.push(price)
+        self._momentum.append(price)
+        self._stochastic.push(price)
+        self._support_resistance.push(price)
+    
+    def _update_rsi(self, delta: float):
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        deltas = self.price_count  # Deltas seen including this one
+        
+        if deltas < self.rsi_period:
+            self._gain_sum += gain
+            self._loss_sum += loss
+        elif deltas == self.rsi_period:
+            self._avg_gain = (self._gain_sum + gain) / self.rsi_period
+            self._avg_loss = (self._loss_sum + loss) / self.rsi_period
+        else:
+            self._avg_gain = (self._avg_gain * (self.rsi_period - 1) + gain) / self.rsi_period
+            self._avg_loss = (self._avg_loss * (self.rsi_period - 1) + loss) / self.rsi_period
+    
+    def features(self) -> Dict[str, float]:
+        """Current indicator values, keyed like calculate_technical_indicators"""
+        if self.tick_count < 2:
+            return {
+                'rsi': 50.0,
+                'macd': 0.0,
+                'macd_signal': 0.0,
+                'bollinger_upper': 0.0,
+                'bollinger_lower': 0.0,
+                'bollinger_middle': 0.0,
+                'momentum_14': 0.0,
+                'stochastic': 50.0,
+            }
+        
+        if self.price_count < 2:
+            # Same fallback as calculate_technical_indicators: a flat [0.5, 0.5] series
+            features = type(self).from_history([2.0, 2.0], **self._config).features()
+            features['market_activity'] = self.tick_count / 100.0
+            return features
+        
+        features = {}
+        current = self.last_price
+        
+        # 1. RSI
+        if self.price_count < self.rsi_period + 1:
+            features['rsi'] = 50.0
+        elif self._avg_loss == 0:
+            features['rsi'] = 100.0
+        else:
+            features['rsi'] = 100 - (100 / (1 + self._avg_gain / self._avg_loss))
+        
+        # 2. MACD
+        if self.price_count < self.macd_slow:
+            features['macd'] = 0.0
+            features['macd_signal'] = 0.0
+            features['macd_histogram'] = 0.0
+        else:
+            macd_line = self._ema_fast - self._ema_slow
+            features['macd'] = macd_line
+            features['macd_signal'] = self._signal
+            features['macd_histogram'] = macd_line - self._signal
+        
+        # 3. Bollinger Bands
+        middle = self._bollinger.mean
+        std = self._bollinger.std
+        upper = middle + (self.bollinger_std * std)
+        lower = middle - (self.bollinger_std * std)
+        features['bollinger_upper'] = upper
+        features['bollinger_lower'] = lower
+        features['bollinger_middle'] = middle
+        features['bollinger_width'] = (upper - lower) / middle if middle > 0 else 0.0
+        features['bollinger_position'] = (current - lower) / (upper - lower) if (upper - lower) > 0 else 0.5
+        
+        # 4. Momentum
+        if len(self._momentum) < self._momentum.maxlen:
+            features['momentum_14'] = 0.0
+        else:
+            features['momentum_14'] = current - self._momentum[0]
+        
+        # 5. Stochastic Oscillator
+        high = self._stochastic.max
+        low = self._stochastic.min
+        features['stochastic'] = 50.0 if high == low else ((current - low) / (high - low)) * 100
+        
+        # 6. Support and Resistance levels
+        support = self._support_resistance.min
+        resistance = self._support_resistance.max
+        features['support_level'] = support
+        features['resistance_level'] = resistance
+        if self.price_count < 5:
+            features['distance_to_support'] = 0.0
+            features['distance_to_resistance'] = 0.0
+        elif resistance - support > 0:
+            features['distance_to_support'] = (current - support) / (resistance - support)
+            features['distance_to_resistance'] = (resistance - current) / (resistance - support)
+        else:
+            features['distance_to_support'] = 0.5
+            features['distance_to_resistance'] = 0.5
+        
+        # 7. Market activity
+        features['market_activity'] = self.tick_count / 100.0
+        
+        return features
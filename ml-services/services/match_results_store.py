@@ -0,0 +1,275 @@
+"""
+Match Results Store
+Columnar store of finished results backed by a NumPy structured array,
+with interned integer team ids and int16 scores.
+
+The form / head-to-head helpers of AdvancedFeatureEngineering (_is_win, _get_goals_for,
+_get_goals_against, _team_won, _get_team_goals, ...) are reimplemented here as
+vectorized boolean masks over record slices instead of per-row dict lookups.
+Results are expected to be appended in chronological order.
+
+Head-to-head lookups go through HeadToHeadIndex, which maps each unordered team pair
+to its time-sorted rows, so no scan over unrelated matches is needed.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import uuid
+import numpy as np
+
+RESULT_DTYPE = np.dtype([
+    ('home', np.int32),
+    ('away', np.int32),
+    ('home_score', np.int16),
+    ('away_score', np.int16),
+    ('kickoff', 'datetime64[s]'),
+])
+
+NO_TEAM = -1
+NAT_INT = np.iinfo(np.int64).min  # datetime64 NaT viewed as int64
+
+def to_datetime64(value) -> np.datetime64:
+    """ISO string / datetime -> UTC datetime64[s] (NaT when missing)"""
+    if value is None or value == '':
+        return np.datetime64('NaT', 's')
+    if isinstance(value, np.datetime64):
+        return value.astype('datetime64[s]')
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(value, 's')
+
+# Vectorized helpers over record slices (newest first, like the dict helpers' inputs)
+def is_win(records: np.ndarray, team_id: int, is_home: bool) -> np.ndarray:
+    """Mask of matches the team won on the given side"""
+    if is_home:
+        return (records['home'] == team_id) & (records['home_score'] > records['away_score'])
+    return (records['away'] == team_id) & (records['away_score'] > records['home_score'])
+
+def goals_for(records: np.ndarray, team_id: int, is_home: bool) -> np.ndarray:
+    """Goals scored by the team on the given side (0 when it played the other side)"""
+    if is_home:
+        return np.where(records['home'] == team_id, records['home_score'], 0)
+    return np.where(records['away'] == team_id, records['away_score'], 0)
+
+def goals_against(records: np.ndarray, team_id: int, is_home: bool) -> np.ndarray:
+    """Goals conceded by the team on the given side (0 when it played the other side)"""
+    if is_home:
+        return np.where(records['home'] == team_id, records['away_score'], 0)
+    return np.where(records['away'] == team_id, records['home_score'], 0)
+
+def total_goals(records: np.ndarray) -> np.ndarray:
+    return records['home_score'].astype(np.int32) + records['away_score']
+
+def team_won(records: np.ndarray, team_id: int) -> np.ndarray:
+    """Mask of matches won by the team on either side"""
+    return is_win(records, team_id, True) | is_win(records, team_id, False)
+
+def is_draw(records: np.ndarray) -> np.ndarray:
+    return records['home_score'] == records['away_score']
+
+def team_goals(records: np.ndarray, team_id: int) -> np.ndarray:
+    """Goals scored by the team on either side"""
+    return np.where(
+        records['home'] == team_id, records['home_score'],
+        np.where(records['away'] == team_id, records['away_score'], 0)
+    )
+
+def streak(wins: np.ndarray) -> float:
+    """Current win/loss streak from a newest-first win mask (as _calculate_streak)"""
+    if len(wins) == 0:
+        return 0.0
+    changes = np.nonzero(wins != wins[0])[0]
+    run = int(changes[0]) if len(changes) else len(wins)
+    return float(run if wins[0] else -run)
+
+class HeadToHeadIndex:
+    """
+    Unordered team pair -> row indices of their meetings, sorted by kickoff
+    Updated incrementally as results are appended
+    """
+    
+    def __init__(self):
+        # (low id, high id) -> (kickoffs as int64 seconds, rows), both sorted by kickoff
+        self._pairs: Dict[Tuple[int, int], Tuple[List[int], List[int]]] = {}
+    
+    @staticmethod
+    def pair_key(team1_id: int, team2_id: int) -> Tuple[int, int]:
+        return (team1_id, team2_id) if team1_id <= team2_id else (team2_id, team1_id)
+    
+    def add(self, home_id: int, away_id: int, kickoff: np.datetime64, row: int):
+        kickoffs, rows = self._pairs.setdefault(self.pair_key(home_id, away_id), ([], []))
+        seconds = int(kickoff.astype('datetime64[s]').astype(np.int64))
+        position = bisect_right(kickoffs, seconds)  # Ties keep insertion order
+        kickoffs.insert(position, seconds)
+        rows.insert(position, row)
+    
+    def rows(self, team1_id: int, team2_id: int, before=None, limit: Optional[int] = None) -> np.ndarray:
+        """Rows of the pair's meetings, newest first (optionally kicked off before `before`)"""
+        entry = self._pairs.get(self.pair_key(team1_id, team2_id))
+        if entry is None:
+            return np.empty(0, dtype=np.int64)
+        kickoffs, rows = entry
+        end = len(rows)
+        start = 0
+        if before is not None:
+            # Meetings without a kickoff time cannot be placed before anything
+            start = bisect_right(kickoffs, NAT_INT)
+            end = bisect_left(kickoffs, int(to_datetime64(before).astype(np.int64)), lo=start)
+        if limit is not None:
+            start = max(start, end - limit)
+        return np.array(rows[start:end][::-1], dtype=np.int64)
+    
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+class MatchResultsStore:
+    """
+    Append-only columnar store of finished results
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        self._data = np.zeros(capacity, dtype=RESULT_DTYPE)
+        self.size = 0
+        self.team_ids: Dict[str, int] = {}
+        self.team_names: List[str] = []
+        self.h2h_index = HeadToHeadIndex()
+        self.cache_token = uuid.uuid4().hex  # Identity in feature cache keys (id() values get reused)
+    
+    @classmethod
+    def from_results(cls, results: Iterable[Dict]) -> 'MatchResultsStore':
+        results = list(results)
+        store = cls(capacity=max(len(results), 1))
+        store.extend(results)
+        return store
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    @property
+    def records(self) -> np.ndarray:
+        """View of all stored results, oldest first"""
+        return self._data[:self.size]
+    
+    def intern(self, team_name: str) -> int:
+        """Integer id for a team name, assigned on first sight"""
+        team_id = self.team_ids.get(team_name)
+        if team_id is None:
+            team_id = len(self.team_names)
+            self.team_ids[team_name] = team_id
+            self.team_names.append(team_name)
+        return team_id
+    
+    def team_id(self, team: Union[str, int]) -> int:
+        if isinstance(team, str):
+            return self.team_ids.get(team, NO_TEAM)
+        return int(team)
+    
+    def append(self, result: Dict) -> int:
+        """Add one finished result, returning its row index"""
+        if self.size == len(self._data):
+            grown = np.zeros(max(2 * len(self._data), 1), dtype=RESULT_DTYPE)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        
+        row = self.size
+        record = self._data[row]
+        record['home'] = self.intern(result.get('homeTeam', ''))
+        record['away'] = self.intern(result.get('awayTeam', ''))
+        record['home_score'] = result.get('homeScore', 0) or 0
+        record['away_score'] = result.get('awayScore', 0) or 0
+        record['kickoff'] = to_datetime64(result.get('date') or result.get('startTime'))
+        self.size += 1
+        self.h2h_index.add(int(record['home']), int(record['away']), record['kickoff'], row)
+        return row
+    
+    def extend(self, results: Iterable[Dict]):
+        for result in results:
+            self.append(result)
+    
+    def team_rows(self, team: Union[str, int], before=None, limit: Optional[int] = None) -> np.ndarray:
+        """Row indices of a team's matches, newest first (optionally kicked off before `before`)"""
+        team_id = self.team_id(team)
+        records = self.records
+        mask = (records['home'] == team_id) | (records['away'] == team_id)
+        if before is not None:
+            mask &= records['kickoff'] < to_datetime64(before)
+        rows = np.nonzero(mask)[0][::-1]
+        return rows[:limit] if limit is not None else rows
+    
+    def pair_rows(self, team1: Union[str, int], team2: Union[str, int], before=None, limit: Optional[int] = None) -> np.ndarray:
+        """Row indices of matches between two teams, newest first (via the pair index)"""
+        return self.h2h_index.rows(self.team_id(team1), self.team_id(team2), before=before, limit=limit)
+    
+    def form_features(self, team: Union[str, int], is_home: bool = True, before=None) -> Optional[Dict[str, float]]:
+        """
+        Same dict as AdvancedFeatureEngineering.calculate_team_form_features over the
+        team's last 10 matches; None when the team has no matches
+        """
+        team_id = self.team_id(team)
+        recent = self.records[self.team_rows(team_id, before=before, limit=10)]
+        n = len(recent)
+        if n == 0:
+            return None
+        n_5 = min(5, n)
+        last_5 = recent[:5]
+        
+        wins = is_win(recent, team_id, is_home)
+        wins_5 = int(wins[:5].sum())
+        wins_10 = int(wins.sum())
+        
+        features = {}
+        features['win_rate_5'] = wins_5 / n_5
+        features['win_rate_10'] = wins_10 / n
+        features['goals_for_avg_5'] = int(goals_for(last_5, team_id, is_home).sum()) / n_5
+        features['goals_against_avg_5'] = int(goals_against(last_5, team_id, is_home).sum()) / n_5
+        features['goal_difference_5'] = features['goals_for_avg_5'] - features['goals_against_avg_5']
+        
+        features['current_streak'] = streak(wins)
+        features['is_winning_streak'] = 1.0 if features['current_streak'] > 0 else 0.0
+        features['is_losing_streak'] = 1.0 if features['current_streak'] < 0 else 0.0
+        features['form_trend'] = (wins_5 - (wins_10 - wins_5)) / 5.0 if n >= 5 else 0.0
+        
+        # Venue derived from the record rather than an 'is_home' field
+        side = (recent['home'] == team_id) if is_home else (recent['away'] == team_id)
+        played = int(side.sum())
+        rate = int((wins & side).sum()) / played if played else 0.5
+        features['home_win_rate' if is_home else 'away_win_rate'] = rate
+        
+        features['clean_sheet_rate_5'] = int((goals_against(last_5, team_id, is_home) == 0).sum()) / n_5
+        features['over_2_5_rate'] = int((total_goals(last_5) > 2.5).sum()) / n_5
+        
+        return features
+    
+    def head_to_head_features(self, team1: Union[str, int], team2: Union[str, int], before=None) -> Optional[Dict[str, float]]:
+        """
+        Same dict as AdvancedFeatureEngineering.calculate_head_to_head_features over the
+        last 10 meetings; None when the teams never met
+        """
+        id1, id2 = self.team_id(team1), self.team_id(team2)
+        recent = self.records[self.pair_rows(id1, id2, before=before, limit=10)]
+        n = len(recent)
+        if n == 0:
+            return None
+        
+        won = team_won(recent, id1)
+        features = {}
+        features['h2h_win_rate_team1'] = int(won.sum()) / n
+        features['h2h_win_rate_team2'] = 1.0 - features['h2h_win_rate_team1']
+        features['h2h_draw_rate'] = int(is_draw(recent).sum()) / n
+        
+        team1_goals_avg = np.mean(team_goals(recent, id1))
+        team2_goals_avg = np.mean(team_goals(recent, id2))
+        features['h2h_goals_team1_avg'] = team1_goals_avg
+        features['h2h_goals_team2_avg'] = team2_goals_avg
+        features['h2h_total_goals_avg'] = team1_goals_avg + team2_goals_avg
+        
+        features['h2h_recent_trend'] = (int(won[:3].sum()) - 1.5) / 1.5 if n >= 3 else 0.0
+        
+        # Home advantage from team1's perspective (team1 playing at home)
+        at_home = recent['home'] == id1
+        home_matches = int(at_home.sum())
+        features['h2h_home_advantage'] = int((at_home & won).sum()) / home_matches if home_matches else 0.5
+        
+        return features
@@ -4,13 +4,15 @@ Uses ML models to predict and set odds for sports events
 """
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 import numpy as np
 import pandas as pd
 from datetime import datetime
 import httpx
 import os
 
+from services.team_strength import TeamStrengthModel
+
 router = APIRouter()
 
 class OddsRequest(BaseModel):
@@ -34,6 +36,19 @@ class OddsPredictor:
         self.model_version = "1.0.0"
         # In production, load trained models here
         # self.model = load_model('models/odds_predictor.h5')
+        # Fitted attack/defence parameters per sport/league (see TeamStrengthFitter)
+        self.team_strength: Dict[str, TeamStrengthModel] = {}
+    
+    def set_team_strength(self, sport_id: str, model: TeamStrengthModel):
+        """Price events of this sport/league from a fitted team strength model"""
+        self.team_strength[sport_id] = model
+    
+    def _strength_model(self, sport_id: Optional[str], home_team: Optional[str], away_team: Optional[str]) -> Optional[TeamStrengthModel]:
+        """Fitted model that knows both teams, if any"""
+        model = self.team_strength.get(sport_id) if sport_id else None
+        if model is None or home_team not in model or away_team not in model:
+            return None
+        return model
     
     def predict_odds(self, request: OddsRequest) -> OddsResponse:
         """
@@ -48,10 +63,17 @@ class OddsPredictor:
             # 4. Calculate probabilities
             # 5. Convert to decimal odds with margin
             
-            # Mock prediction for now
-            home_prob = 0.45
-            draw_prob = 0.25
-            away_prob = 0.30
+            strength = self._strength_model(request.sportId, request.homeTeam, request.awayTeam)
+            if strength is not None:
+                outcomes = strength.outcome_probabilities(request.homeTeam, request.awayTeam)
+                home_prob = outcomes['home']
+                draw_prob = outcomes['draw']
+                away_prob = outcomes['away']
+            else:
+                # Mock prediction for now
+                home_prob = 0.45
+                draw_prob = 0.25
+                away_prob = 0.30
             
             # Apply margin (5%)
             margin = 0.05
@@ -96,13 +118,19 @@ class OddsPredictor:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
     
-    def predict_over_under(self, eventId: str, line: float) -> dict:
+    def predict_over_under(self, eventId: str, line: float, sportId: Optional[str] = None,
+                           homeTeam: Optional[str] = None, awayTeam: Optional[str] = None) -> dict:
         """
         Predict over/under odds for a specific line
         """
-        # Mock prediction
-        over_prob = 0.52
-        under_prob = 0.48
+        strength = self._strength_model(sportId, homeTeam, awayTeam)
+        if strength is not None:
+            over_prob = strength.over_probability(homeTeam, awayTeam, line)
+            under_prob = 1.0 - over_prob
+        else:
+            # Mock prediction
+            over_prob = 0.52
+            under_prob = 0.48
         
         margin = 0.05
         over_prob *= (1 - margin)
@@ -151,9 +179,10 @@ async def predict_odds(request: OddsRequest):
     return predictor.predict_odds(request)
 
 @router.post("/over-under")
-async def predict_over_under(eventId: str, line: float):
+async def predict_over_under(eventId: str, line: float, sportId: Optional[str] = None,
+                             homeTeam: Optional[str] = None, awayTeam: Optional[str] = None):
     """Predict over/under odds"""
-    return predictor.predict_over_under(eventId, line)
+    return predictor.predict_over_under(eventId, line, sportId, homeTeam, awayTeam)
 
 @router.post("/live-update")
 async def update_odds_live(eventId: str, currentScore: dict, timeElapsed: int):
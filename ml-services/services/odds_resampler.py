@@ -0,0 +1,128 @@
+"""
+Odds Resampler
+Turns irregular, timestamped odds ticks into fixed-interval bars (OHLC, last, tick count).
+
+Indicators computed on raw ticks treat every tick as one period, so RSI(14) spans
+minutes in a busy market and days in a quiet one. Computed on bars, a period is a
+fixed amount of time, and long-lived markets shrink from thousands of ticks to a
+handful of bars. Bars are epoch-aligned ('1h' bars start on the hour, UTC) and
+ticks are bucketed with one vectorized searchsorted over the bar edges.
+"""
+from typing import Dict, Sequence, Tuple, Union
+import numpy as np
+
+from services.match_results_store import to_datetime64
+
+INTERVALS = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '30m': 1800,
+    '1h': 3600,
+    '4h': 14400,
+    '1d': 86400,
+}
+
+def interval_seconds(interval: Union[str, int]) -> int:
+    """'5m' / '1h' / '1d' (or a number of seconds) -> seconds"""
+    if isinstance(interval, str):
+        if interval not in INTERVALS:
+            raise ValueError(f"Unknown interval {interval!r}, expected one of {list(INTERVALS)} or seconds")
+        return INTERVALS[interval]
+    seconds = int(interval)
+    if seconds <= 0:
+        raise ValueError("Interval must be positive")
+    return seconds
+
+def ticks_to_arrays(ticks: Sequence[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """Tick dicts ('timestamp', 'odds') -> time-sorted (datetime64[s], float64) arrays"""
+    times = np.array([to_datetime64(tick.get('timestamp')) for tick in ticks], dtype='datetime64[s]')
+    odds = np.array([float(tick.get('odds', np.nan)) for tick in ticks], dtype=np.float64)
+    keep = ~np.isnat(times) & ~np.isnan(odds)
+    times, odds = times[keep], odds[keep]
+    order = np.argsort(times, kind='stable')
+    return times[order], odds[order]
+
+class OddsBars:
+    """Fixed-interval bars; `close` (= last) is the series the indicators use"""
+    
+    def __init__(self, start: np.ndarray, open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                 close: np.ndarray, count: np.ndarray, interval: int):
+        self.start = start
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.count = count
+        self.interval = interval
+    
+    @property
+    def last(self) -> np.ndarray:
+        return self.close
+    
+    def __len__(self) -> int:
+        return len(self.close)
+    
+    def __array__(self, dtype=None, copy=None):
+        return self.close if dtype is None else self.close.astype(dtype)
+
+def resample_ticks(times: Union[np.ndarray, Sequence],
+                   odds: Sequence[float],
+                   interval: Union[str, int] = '1h',
+                   end=None,
+                   fill: bool = True) -> OddsBars:
+    """
+    Bucket time-sorted ticks into bars of `interval`
+    
+    With `fill`, bars without ticks carry the previous close forward (count 0), so
+    the bars are evenly spaced; otherwise empty bars are dropped. `end` extends the
+    bars up to the bar containing that time (e.g. a prediction snapshot); ticks
+    after `end` are ignored.
+    """
+    step = interval_seconds(interval)
+    seconds = np.asarray(times, dtype='datetime64[s]').astype(np.int64)
+    odds = np.asarray(odds, dtype=np.float64)
+    if end is not None:
+        end_seconds = int(to_datetime64(end).astype(np.int64))
+        cut = int(np.searchsorted(seconds, end_seconds, side='right'))
+        seconds, odds = seconds[:cut], odds[:cut]
+    
+    if len(seconds) == 0:
+        empty = np.empty(0)
+        return OddsBars(np.empty(0, dtype='datetime64[s]'), empty, empty, empty, empty, np.empty(0, dtype=np.int64), step)
+    
+    first_bar = seconds[0] // step
+    last_bar = (end_seconds if end is not None else seconds[-1]) // step
+    edges = (first_bar + np.arange(last_bar - first_bar + 2)) * step
+    bounds = np.searchsorted(seconds, edges, side='left')
+    starts, stops = bounds[:-1], bounds[1:]
+    count = stops - starts
+    filled = count > 0
+    
+    close = np.full(len(count), np.nan)
+    open_ = np.full(len(count), np.nan)
+    high = np.full(len(count), np.nan)
+    low = np.full(len(count), np.nan)
+    close[filled] = odds[stops[filled] - 1]
+    open_[filled] = odds[starts[filled]]
+    high[filled] = np.maximum.reduceat(odds, starts[filled])
+    low[filled] = np.minimum.reduceat(odds, starts[filled])
+    bar_start = edges[:-1].astype('datetime64[s]')
+    
+    if not fill:
+        return OddsBars(bar_start[filled], open_[filled], high[filled], low[filled], close[filled], count[filled], step)
+    
+    # Carry the last close through empty bars (the first bar always has a tick)
+    previous = np.maximum.accumulate(np.where(filled, np.arange(len(count)), 0))
+    carried = close[previous]
+    empty = ~filled
+    close[empty] = carried[empty]
+    open_[empty] = carried[empty]
+    high[empty] = carried[empty]
+    low[empty] = carried[empty]
+    return OddsBars(bar_start, open_, high, low, close, count, step)
+
+def resample_tick_dicts(ticks: Sequence[Dict], interval: Union[str, int] = '1h', end=None, fill: bool = True) -> OddsBars:
+    """resample_ticks for tick dicts with 'timestamp' and 'odds'"""
+    times, odds = ticks_to_arrays(ticks)
+    return resample_ticks(times, odds, interval, end=end, fill=fill)
@@ -0,0 +1,131 @@
+"""
+Parallel Feature Builder
+Builds AdvancedFeatureEngineering feature matrices across worker processes.
+
+Samples are split into fixed-size chunks of rows and each worker writes its rows
+straight into one float32 matrix in shared memory, so only (start, stop) ranges
+travel back and forth - no per-row pickling of results. Samples reach the workers
+through the pool initializer, which under the default 'fork' start method means
+they are inherited rather than pickled.
+
+Every row depends only on its own sample, and chunk boundaries do not depend on
+the worker count, so the matrix is identical for any number of workers. Samples
+without a prediction_time get one shared snapshot time taken before the build.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+import multiprocessing
+import os
+import numpy as np
+
+from services.advanced_feature_engineering import AdvancedFeatureEngineering, ADVANCED_FEATURE_SCHEMA
+from services.feature_schema import FeatureSchema
+
+DEFAULT_CHUNK_SIZE = 256
+
+class _NoCache:
+    """FeatureCache stand-in that never stores anything"""
+    
+    def make_key(self, *args, **kwargs) -> str:
+        return ''
+    
+    def get(self, key: str) -> None:
+        return None
+    
+    def set(self, key: str, features: Dict[str, float]):
+        pass
+
+# Per-worker state, set by _init_worker
+_worker_state: Dict = {}
+
+def _init_worker(shm_name: str, shape: Tuple[int, int], dtype: str, samples: Sequence[Dict], schema: FeatureSchema):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_state['shm'] = shm  # Keep the mapping alive for the worker's lifetime
+    _worker_state['matrix'] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _worker_state['samples'] = samples
+    _worker_state['schema'] = schema
+    # The cache only helps repeated requests; every training row is built once
+    _worker_state['engineer'] = AdvancedFeatureEngineering(feature_cache=_NoCache())
+
+def _build_chunk(start: int, stop: int) -> int:
+    """Fill rows [start, stop) of the shared matrix"""
+    engineer: AdvancedFeatureEngineering = _worker_state['engineer']
+    engineer.create_feature_matrix(
+        _worker_state['samples'][start:stop],
+        out=_worker_state['matrix'][start:stop],
+        schema=_worker_state['schema'],
+    )
+    return stop - start
+
+class ParallelFeatureBuilder:
+    """
+    Feature matrix builder that spreads chunks of samples over a process pool
+    """
+    
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 schema: FeatureSchema = ADVANCED_FEATURE_SCHEMA,
+                 start_method: Optional[str] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.schema = schema
+        if start_method is None:
+            start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.start_method = start_method
+    
+    def chunks(self, n_samples: int) -> List[Tuple[int, int]]:
+        """Row ranges handed to workers (independent of the worker count)"""
+        return [(start, min(start + self.chunk_size, n_samples)) for start in range(0, n_samples, self.chunk_size)]
+    
+    def build(self, samples: Sequence[Dict], prediction_time: Optional[datetime] = None) -> np.ndarray:
+        """
+        Feature matrix (n_samples x n_features, float32) for create_feature_vector
+        keyword-argument samples, as AdvancedFeatureEngineering.create_feature_matrix
+        """
+        samples = self._with_prediction_time(samples, prediction_time)
+        shape = (len(samples), len(self.schema))
+        chunks = self.chunks(len(samples))
+        workers = min(self.max_workers, len(chunks))
+        
+        if workers <= 1:
+            engineer = AdvancedFeatureEngineering(feature_cache=_NoCache())
+            return engineer.create_feature_matrix(samples, schema=self.schema)
+        
+        shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * self.schema.dtype.itemsize))
+        matrix = np.ndarray(shape, dtype=self.schema.dtype, buffer=shm.buf)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_init_worker,
+                initargs=(shm.name, shape, self.schema.dtype.str, samples, self.schema),
+            ) as pool:
+                starts, stops = zip(*chunks)
+                built = sum(pool.map(_build_chunk, starts, stops))
+            if built != shape[0]:
+                raise RuntimeError(f"Built {built} of {shape[0]} feature rows")
+            return matrix.copy()
+        finally:
+            del matrix  # Release the buffer export before closing the segment
+            shm.close()
+            shm.unlink()
+    
+    @staticmethod
+    def _with_prediction_time(samples: Sequence[Dict], prediction_time: Optional[datetime]) -> List[Dict]:
+        """Pin a prediction_time on every sample so the output does not depend on when a worker runs"""
+        if prediction_time is None:
+            prediction_time = datetime.now()
+        return [
+            sample if sample.get('prediction_time') is not None else {**sample, 'prediction_time': prediction_time}
+            for sample in samples
+        ]
+
+def build_feature_matrix(samples: Sequence[Dict],
+                         max_workers: Optional[int] = None,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         prediction_time: Optional[datetime] = None) -> np.ndarray:
+    """Convenience wrapper around ParallelFeatureBuilder.build"""
+    return ParallelFeatureBuilder(max_workers=max_workers, chunk_size=chunk_size).build(samples, prediction_time)
@@ -0,0 +1,162 @@
+"""
+Team Form Index
+Ingests finished results once and keeps rolling 5- and 10-match aggregates per team,
+so form features are a dictionary lookup instead of a scan over recent results.
+
+form_features(team, is_home) returns the same dict as
+AdvancedFeatureEngineering.calculate_team_form_features(recent_results, team, is_home)
+when recent_results is the team's matches newest first. The venue of each match is
+derived from the result (team == homeTeam) instead of an 'is_home' field.
+"""
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Tuple
+import uuid
+
+FORM_WINDOW = 10
+SHORT_WINDOW = 5
+
+# Per-match contribution slots
+WIN_HOME, WIN_AWAY, GF_HOME, GF_AWAY, GA_HOME, GA_AWAY, CLEAN_HOME, CLEAN_AWAY, OVER_2_5, PLAYED_HOME = range(10)
+N_SLOTS = 10
+
+def _result_time(result: Dict):
+    return result.get('date') or result.get('startTime') or result.get('start_time') or ''
+
+class TeamForm:
+    """Rolling aggregates for one team (most recent FORM_WINDOW matches)"""
+    
+    def __init__(self):
+        self.matches: Deque[Tuple[int, ...]] = deque(maxlen=FORM_WINDOW)
+        self.sums_5 = [0] * N_SLOTS
+        self.sums_10 = [0] * N_SLOTS
+        self.streak_home = 0  # Streak from the home-team perspective
+        self.streak_away = 0
+        self.version = 0
+    
+    def push(self, contribution: Tuple[int, ...]):
+        """Add the newest match, dropping the ones that leave each window"""
+        if len(self.matches) >= SHORT_WINDOW:
+            leaving = self.matches[SHORT_WINDOW - 1]
+            for slot in range(N_SLOTS):
+                self.sums_5[slot] -= leaving[slot]
+        if len(self.matches) >= FORM_WINDOW:
+            leaving = self.matches[FORM_WINDOW - 1]
+            for slot in range(N_SLOTS):
+                self.sums_10[slot] -= leaving[slot]
+        
+        self.matches.appendleft(contribution)
+        for slot in range(N_SLOTS):
+            self.sums_5[slot] += contribution[slot]
+            self.sums_10[slot] += contribution[slot]
+        
+        self.streak_home = self._next_streak(self.streak_home, contribution[WIN_HOME])
+        self.streak_away = self._next_streak(self.streak_away, contribution[WIN_AWAY])
+        self.version += 1
+    
+    @staticmethod
+    def _next_streak(streak: int, won: int) -> int:
+        # Same rule as _calculate_streak, capped at the form window it scans
+        if won:
+            streak = streak + 1 if streak >= 0 else 1
+        else:
+            streak = streak - 1 if streak <= 0 else -1
+        return max(-FORM_WINDOW, min(FORM_WINDOW, streak))
+
+class TeamFormIndex:
+    """
+    Rolling form aggregates for every team, fed with finished results in time order
+    """
+    
+    def __init__(self):
+        self.teams: Dict[str, TeamForm] = {}
+        self._features: Dict[Tuple[str, bool], Dict[str, float]] = {}
+        self.cache_token = uuid.uuid4().hex  # Identity in feature cache keys (id() values get reused)
+    
+    def __contains__(self, team_name: str) -> bool:
+        return team_name in self.teams
+    
+    def ingest(self, result: Dict):
+        """Add one finished result (must be newer than everything ingested so far)"""
+        home_team = result.get('homeTeam', '')
+        away_team = result.get('awayTeam', '')
+        home_score = result.get('homeScore', 0)
+        away_score = result.get('awayScore', 0)
+        over_2_5 = 1 if home_score + away_score > 2.5 else 0
+        
+        self._push(home_team, (
+            1 if home_score > away_score else 0, 0,
+            home_score, 0,
+            away_score, 0,
+            1 if away_score == 0 else 0, 1,
+            over_2_5, 1,
+        ))
+        self._push(away_team, (
+            0, 1 if away_score > home_score else 0,
+            0, away_score,
+            0, home_score,
+            1, 1 if home_score == 0 else 0,
+            over_2_5, 0,
+        ))
+    
+    def ingest_many(self, results: Iterable[Dict]):
+        """Add finished results, sorted by date/startTime when available"""
+        for result in sorted(results, key=_result_time):
+            self.ingest(result)
+    
+    def _push(self, team_name: str, contribution: Tuple[int, ...]):
+        form = self.teams.get(team_name)
+        if form is None:
+            form = self.teams[team_name] = TeamForm()
+        form.push(contribution)
+        self._features.pop((team_name, True), None)
+        self._features.pop((team_name, False), None)
+    
+    def team_version(self, team_name: str) -> int:
+        """Changes every time a result for the team is ingested"""
+        form = self.teams.get(team_name)
+        return form.version if form else 0
+    
+    def form_features(self, team_name: str, is_home: bool = True) -> Optional[Dict[str, float]]:
+        """Form features for a team, or None if the team has no results"""
+        cached = self._features.get((team_name, is_home))
+        if cached is not None:
+            return dict(cached)
+        
+        form = self.teams.get(team_name)
+        if form is None:
+            return None
+        
+        n_10 = len(form.matches)
+        n_5 = min(SHORT_WINDOW, n_10)
+        win, gf, ga, clean = (WIN_HOME, GF_HOME, GA_HOME, CLEAN_HOME) if is_home else (WIN_AWAY, GF_AWAY, GA_AWAY, CLEAN_AWAY)
+        
+        features = {}
+        features['win_rate_5'] = form.sums_5[win] / n_5
+        features['win_rate_10'] = form.sums_10[win] / n_10
+        features['goals_for_avg_5'] = form.sums_5[gf] / n_5
+        features['goals_against_avg_5'] = form.sums_5[ga] / n_5
+        features['goal_difference_5'] = features['goals_for_avg_5'] - features['goals_against_avg_5']
+        
+        streak = form.streak_home if is_home else form.streak_away
+        features['current_streak'] = float(streak)
+        features['is_winning_streak'] = 1.0 if streak > 0 else 0.0
+        features['is_losing_streak'] = 1.0 if streak < 0 else 0.0
+        
+        if n_10 >= SHORT_WINDOW:
+            older_wins = form.sums_10[win] - form.sums_5[win]
+            features['form_trend'] = (form.sums_5[win] - older_wins) / 5.0
+        else:
+            features['form_trend'] = 0.0
+        
+        home_played = form.sums_10[PLAYED_HOME]
+        if is_home:
+            features['home_win_rate'] = form.sums_10[WIN_HOME] / home_played if home_played else 0.5
+        else:
+            away_played = n_10 - home_played
+            features['away_win_rate'] = form.sums_10[WIN_AWAY] / away_played if away_played else 0.5
+        
+        features['clean_sheet_rate_5'] = form.sums_5[clean] / n_5
+        features['over_2_5_rate'] = form.sums_5[OVER_2_5] / n_5
+        
+        self._features[(team_name, is_home)] = features
+        return dict(features)
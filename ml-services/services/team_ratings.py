@@ -0,0 +1,160 @@
+"""
+Team Ratings
+Elo ratings kept in a contiguous float64 array indexed by integer team id.
+
+update() applies one finished result in O(1). replay() applies a whole history in
+batches: one sequential pass groups matches into rounds in which no team plays
+twice, then each round is applied as one NumPy update. This gives the same ratings
+(to float rounding) as applying the results one by one in time order, since matches
+in a round touch disjoint teams and a team's matches keep their order across rounds.
+The gain over update() grows with the matches per round: large with many teams
+(e.g. several leagues at once), small for a single league of 20 teams.
+
+Team ids are interned like MatchResultsStore ids; pass a store's `team_ids` to
+start from the same ids (the mapping is copied, so names the ratings intern later
+don't reach the store), or replay the store's records directly.
+"""
+from typing import Dict, Iterable, List, Optional, Union
+import uuid
+import numpy as np
+
+from services.match_results_store import MatchResultsStore
+
+RATING_FEATURE_COLUMNS = (
+    'elo_diff',
+    'elo_expected_score',
+)
+
+def _match_score(home_score, away_score):
+    """1 for a home win, 0.5 for a draw, 0 for an away win (scalar or array)"""
+    return (np.sign(np.asarray(home_score, dtype=np.float64) - away_score) + 1.0) / 2.0
+
+class EloRatings:
+    """
+    Elo rating engine over team-id indexed arrays
+    """
+    
+    def __init__(self,
+                 k_factor: float = 20.0,
+                 home_advantage: float = 60.0,
+                 initial_rating: float = 1500.0,
+                 capacity: int = 256,
+                 team_ids: Optional[Dict[str, int]] = None):
+        self.k_factor = k_factor
+        self.home_advantage = home_advantage
+        self.initial_rating = initial_rating
+        # A copy: interning here must not add names to a store's mapping behind its team_names
+        self.team_ids: Dict[str, int] = dict(team_ids) if team_ids is not None else {}
+        self.ratings = np.full(max(capacity, len(self.team_ids), 1), initial_rating)
+        self.matches_played = np.zeros(len(self.ratings), dtype=np.int64)
+        self.version = 0
+        self.cache_token = uuid.uuid4().hex  # Identity in feature cache keys (id() values get reused)
+    
+    def intern(self, team_name: str) -> int:
+        """Integer id for a team name, assigned on first sight"""
+        team_id = self.team_ids.get(team_name)
+        if team_id is None:
+            team_id = len(self.team_ids)
+            self.team_ids[team_name] = team_id
+        return team_id
+    
+    def _ensure_capacity(self, size: int):
+        if size <= len(self.ratings):
+            return
+        capacity = max(size, 2 * len(self.ratings))
+        ratings = np.full(capacity, self.initial_rating)
+        ratings[:len(self.ratings)] = self.ratings
+        played = np.zeros(capacity, dtype=np.int64)
+        played[:len(self.matches_played)] = self.matches_played
+        self.ratings, self.matches_played = ratings, played
+    
+    def rating(self, team: Union[str, int]) -> float:
+        team_id = self.team_ids.get(team) if isinstance(team, str) else int(team)
+        if team_id is None or team_id >= len(self.ratings):
+            return self.initial_rating
+        return float(self.ratings[team_id])
+    
+    def expected_score(self, home: Union[str, int], away: Union[str, int]) -> float:
+        """Expected score of the home team (win probability plus half the draw probability)"""
+        diff = self.rating(home) + self.home_advantage - self.rating(away)
+        return 1.0 / (1.0 + 10.0 ** (-diff / 400.0))
+    
+    def update(self, home: Union[str, int], away: Union[str, int], home_score: int, away_score: int):
+        """Apply one finished result (must be newer than everything applied so far)"""
+        home_id = self.intern(home) if isinstance(home, str) else int(home)
+        away_id = self.intern(away) if isinstance(away, str) else int(away)
+        self._ensure_capacity(max(home_id, away_id) + 1)
+        
+        expected = 1.0 / (1.0 + 10.0 ** (-(self.ratings[home_id] + self.home_advantage - self.ratings[away_id]) / 400.0))
+        change = self.k_factor * (float(_match_score(home_score, away_score)) - expected)
+        self.ratings[home_id] += change
+        self.ratings[away_id] -= change
+        self.matches_played[home_id] += 1
+        self.matches_played[away_id] += 1
+        self.version += 1
+    
+    def ingest(self, result: Dict):
+        """update() from a result dict (homeTeam, awayTeam, homeScore, awayScore)"""
+        self.update(result.get('homeTeam', ''), result.get('awayTeam', ''),
+                    result.get('homeScore', 0) or 0, result.get('awayScore', 0) or 0)
+    
+    def replay(self, home_ids: np.ndarray, away_ids: np.ndarray, home_scores: np.ndarray, away_scores: np.ndarray):
+        """
+        Apply many results (in time order) with one array update per round
+        Same final ratings as calling update() for each result in turn (to rounding)
+        """
+        home_ids = np.asarray(home_ids, dtype=np.int64)
+        away_ids = np.asarray(away_ids, dtype=np.int64)
+        if len(home_ids) == 0:
+            return
+        self._ensure_capacity(int(max(home_ids.max(), away_ids.max())) + 1)
+        scores = _match_score(home_scores, away_scores)
+        
+        rounds = self._rounds(home_ids, away_ids)
+        order = np.argsort(rounds, kind='stable')
+        boundaries = np.flatnonzero(np.diff(rounds[order])) + 1
+        for matches in np.split(order, boundaries):
+            home, away = home_ids[matches], away_ids[matches]
+            expected = 1.0 / (1.0 + 10.0 ** (-(self.ratings[home] + self.home_advantage - self.ratings[away]) / 400.0))
+            change = self.k_factor * (scores[matches] - expected)
+            self.ratings[home] += change  # Teams are distinct within a round
+            self.ratings[away] -= change
+        np.add.at(self.matches_played, home_ids, 1)
+        np.add.at(self.matches_played, away_ids, 1)
+        self.version += 1
+    
+    def replay_store(self, store: MatchResultsStore):
+        """Replay every result of a MatchResultsStore (store ids are mapped to these ratings' ids by name)"""
+        lookup = np.zeros(len(store.team_ids), dtype=np.int64)
+        for name, team_id in store.team_ids.items():
+            lookup[team_id] = self.intern(name)
+        records = store.records
+        self.replay(lookup[records['home']], lookup[records['away']], records['home_score'], records['away_score'])
+    
+    def replay_results(self, results: Iterable[Dict]):
+        """Replay result dicts (in time order)"""
+        # Intern home then away per result, the same id order as ingest()
+        ids = [(self.intern(r.get('homeTeam', '')), self.intern(r.get('awayTeam', ''))) for r in results]
+        scores = [(r.get('homeScore', 0) or 0, r.get('awayScore', 0) or 0) for r in results]
+        ids = np.array(ids, dtype=np.int64).reshape(-1, 2)
+        scores = np.array(scores, dtype=np.int64).reshape(-1, 2)
+        self.replay(ids[:, 0], ids[:, 1], scores[:, 0], scores[:, 1])
+    
+    @staticmethod
+    def _rounds(home_ids: np.ndarray, away_ids: np.ndarray) -> np.ndarray:
+        """Earliest round for each match after both teams' previous matches (sequential pass)"""
+        last_round = [-1] * (int(max(home_ids.max(), away_ids.max())) + 1)
+        rounds: List[int] = []
+        for home, away in zip(home_ids.tolist(), away_ids.tolist()):
+            current = max(last_round[home], last_round[away]) + 1
+            last_round[home] = current
+            last_round[away] = current
+            rounds.append(current)
+        return np.array(rounds, dtype=np.int64)
+    
+    def features(self, home: Union[str, int], away: Union[str, int]) -> Dict[str, float]:
+        """Rating difference (home advantage included) and expected home score"""
+        return {
+            'elo_diff': self.rating(home) + self.home_advantage - self.rating(away),
+            'elo_expected_score': self.expected_score(home, away),
+        }
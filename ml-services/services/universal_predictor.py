@@ -18,20 +18,44 @@ from datetime import datetime
 import pickle
 import os
 import json
+import copy
+import threading
 
 # ML Libraries
-from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import LogisticRegression
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
 
+from services.adapter_jobs import AdapterJob, AdapterJobManager
+from services.adapter_store import AdapterStore
+from services.domain_adapter import DomainAdapter
+from services.universal_stream import EventStream, EventStreamRegistry
+
 router = APIRouter()
 
 # Domain types
 DomainType = Literal["sports", "finance", "crypto", "politics", "generic"]
 
+# Columns of UniversalFeatureExtractor.extract / extract_batch, in order
+UNIVERSAL_FEATURE_NAMES = (
+    'trend',
+    'volatility',
+    'momentum',
+    'consensus',
+    'volume',
+    'hour',
+    'day_of_week',
+    'day_of_month',
+    'mean',
+    'median',
+    'skew',
+)
+
+# Longest history window any feature reads (volatility / statistics)
+HISTORY_WINDOW = 20
+
 class UniversalPredictionRequest(BaseModel):
     domain: DomainType
     eventId: str
@@ -39,6 +63,12 @@ class UniversalPredictionRequest(BaseModel):
     historicalData: Optional[List[Dict]] = None
     marketData: Optional[Dict] = None
 
+class UniversalAppendRequest(BaseModel):
+    domain: DomainType
+    eventId: str
+    points: List[Dict]  # New history points ('value' or 'probability'), oldest first
+    features: Dict = {}
+
 class UniversalPredictionResponse(BaseModel):
     eventId: str
     domain: str
@@ -66,16 +96,19 @@ class UniversalFeatureExtractor:
         """
         features = []
         
+        # History values are parsed once; every feature below reads this array
+        values = self._history_values(historical)
+        
         # 1. Trend (upward/downward movement)
-        trend = self._calculate_trend(data, historical)
+        trend = self._calculate_trend(values)
         features.append(trend)
         
         # 2. Volatility (how much values fluctuate)
-        volatility = self._calculate_volatility(data, historical)
+        volatility = self._calculate_volatility(values)
         features.append(volatility)
         
         # 3. Momentum (rate of change)
-        momentum = self._calculate_momentum(data, historical)
+        momentum = self._calculate_momentum(values)
         features.append(momentum)
         
         # 4. Market consensus (agreement level)
@@ -91,57 +124,169 @@ class UniversalFeatureExtractor:
         features.extend(temporal)
         
         # 7. Statistical features
-        stats = self._calculate_statistical_features(data, historical)
+        stats = self._calculate_statistical_features(values)
         features.extend(stats)
         
         return np.array(features)
     
-    def _calculate_trend(self, data: Dict, historical: Optional[List[Dict]]) -> float:
-        """Calculate trend direction (-1 to 1)"""
-        if not historical or len(historical) < 2:
-            return 0.0
+    def extract_from_stream(self, data: Dict, stream: EventStream) -> np.array:
+        """
+        extract() with the history features read from an event's running state
+        (O(1) per request instead of re-reading the history)
+        """
+        features = [
+            stream.trend,
+            stream.volatility,
+            stream.momentum,
+            self._calculate_consensus(data),
+            self._calculate_volume(data),
+        ]
+        features.extend(self._extract_temporal_features(data))
+        features.extend(stream.statistical_features())
+        return np.array(features)
+    
+    def extract_batch(self, data_list: List[Dict], historical_list: Optional[List[Optional[List[Dict]]]] = None) -> np.ndarray:
+        """
+        extract() for many events at once: an (n x 11) matrix, row i equal to
+        extract(data_list[i], historical_list[i])
+        Histories are right-aligned into an (n x 20) NaN-padded window matrix and
+        every column is computed with masked NumPy reductions over it.
+        """
+        n_rows = len(data_list)
+        if historical_list is None:
+            historical_list = [None] * n_rows
+        out = np.empty((n_rows, len(UNIVERSAL_FEATURE_NAMES)))
+        
+        # Full history lengths (the feature guards use them) and the last 20 values
+        lengths = np.array([len(h) if h else 0 for h in historical_list], dtype=np.int64)
+        window = np.full((n_rows, HISTORY_WINDOW), np.nan)
+        for row, historical in enumerate(historical_list):
+            if historical:
+                values = self._history_values(historical)
+                window[row, HISTORY_WINDOW - len(values):] = values
+        
+        # 1. Trend: least-squares slope over the last 10 values, in closed form
+        trend_window = window[:, -10:]
+        count = np.minimum(lengths, 10)
+        valid = ~np.isnan(trend_window)
+        x = np.arange(10) - (10 - count)[:, None]  # Position within each row's own window
+        x_mean = (count - 1) / 2.0
+        y_mean = np.nansum(trend_window, axis=1) / np.maximum(count, 1)
+        s_xy = np.where(valid, (x - x_mean[:, None]) * (np.nan_to_num(trend_window) - y_mean[:, None]), 0.0).sum(axis=1)
+        s_xx = count * (count ** 2 - 1) / 12.0
+        has_trend = lengths >= 2
+        slope = np.divide(s_xy, s_xx, out=np.zeros(n_rows), where=has_trend)
+        out[:, 0] = np.where(has_trend, np.tanh(slope * 10), 0.0)
+        
+        # 2. Volatility: population std of the last 20 values
+        window_std = self._masked_std(window, np.minimum(lengths, HISTORY_WINDOW))
+        out[:, 1] = np.where(lengths >= 2, np.minimum(1.0, window_std * 2), 0.5)
+        
+        # 3. Momentum: mean of the last 5 values minus mean of the 5 before
+        recent_count = np.minimum(lengths, 5)
+        older_count = np.clip(lengths - 5, 0, 5)
+        recent_mean = np.nansum(window[:, -5:], axis=1) / np.maximum(recent_count, 1)
+        older_mean = np.nansum(window[:, -10:-5], axis=1) / np.maximum(older_count, 1)
+        has_momentum = (lengths >= 3) & (older_count > 0)
+        out[:, 2] = np.where(has_momentum, np.clip((recent_mean - older_mean) * 2, -1, 1), 0.0)
+        
+        # 4. Consensus: agreement between sources
+        sources = [data.get('sources', []) for data in data_list]
+        source_counts = np.array([len(s) for s in sources], dtype=np.int64)
+        source_values = np.full((n_rows, max(int(source_counts.max()) if n_rows else 0, 1)), np.nan)
+        for row, row_sources in enumerate(sources):
+            if len(row_sources) >= 2:
+                source_values[row, :len(row_sources)] = [s.get('value', s.get('probability', 0.5)) for s in row_sources]
+        source_std = self._masked_std(source_values, source_counts)
+        out[:, 3] = np.where(source_counts >= 2, 1.0 - np.minimum(1.0, source_std * 2), 0.7)
         
-        # Get values from historical data
-        values = [h.get('value', h.get('probability', 0.5)) for h in historical[-10:]]
+        # 5. Volume/Activity
+        volume = np.array([data.get('volume', data.get('activity', 0.5)) for data in data_list], dtype=np.float64)
+        out[:, 4] = np.minimum(1.0, volume)
+        
+        # 6. Temporal features, from wall-clock datetime64 values
+        now = datetime.now()
+        timestamps = []
+        for data in data_list:
+            timestamp = data.get('timestamp', now)
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp)
+            timestamps.append(timestamp.replace(tzinfo=None))
+        wall_clock = np.array(timestamps, dtype='datetime64[us]')
+        days = wall_clock.astype('datetime64[D]')
+        out[:, 5] = ((wall_clock - days) // np.timedelta64(1, 'h')) / 24.0
+        out[:, 6] = ((days.astype(np.int64) + 3) % 7) / 7.0  # 1970-01-01 was a Thursday
+        out[:, 7] = ((days - days.astype('datetime64[M]')).astype(np.int64) + 1) / 31.0
+        
+        # 7. Statistical features over the last 20 values
+        has_stats = lengths >= 5
+        out[:, 8:11] = 0.5
+        if has_stats.any():
+            stats_window = window[has_stats]
+            stats_count = np.minimum(lengths[has_stats], HISTORY_WINDOW)
+            mean = np.nansum(stats_window, axis=1) / stats_count
+            std = self._masked_std(stats_window, stats_count)
+            third = np.nansum((stats_window - mean[:, None]) ** 3, axis=1) / stats_count
+            out[has_stats, 8] = mean
+            out[has_stats, 9] = np.nanmedian(stats_window, axis=1)
+            out[has_stats, 10] = np.tanh(third / (std ** 3 + 1e-8))
+        
+        return out
+    
+    @staticmethod
+    def _masked_std(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Population std of each row's non-NaN values (0 for empty rows)"""
+        safe_counts = np.maximum(counts, 1)
+        mean = np.nansum(values, axis=1) / safe_counts
+        return np.sqrt(np.nansum((values - mean[:, None]) ** 2, axis=1) / safe_counts)
+    
+    def _history_values(self, historical: Optional[List[Dict]]) -> np.ndarray:
+        """Last HISTORY_WINDOW history values as a float array (the most any feature reads)"""
+        if not historical:
+            return np.empty(0)
+        return np.array([h.get('value', h.get('probability', 0.5)) for h in historical[-HISTORY_WINDOW:]], dtype=np.float64)
+    
+    def _calculate_trend(self, values: np.ndarray) -> float:
+        """Calculate trend direction (-1 to 1)"""
         if len(values) < 2:
             return 0.0
         
-        # Linear regression slope
-        x = np.arange(len(values))
-        slope = np.polyfit(x, values, 1)[0]
+        # Least-squares slope of the last 10 values, in closed form:
+        # sum((x - x_mean) * (y - y_mean)) / sum((x - x_mean)^2), with sum((x - x_mean)^2) = n(n^2 - 1)/12
+        values = values[-10:]
+        n = len(values)
+        x = np.arange(n) - (n - 1) / 2.0
+        slope = np.dot(x, values - values.sum() / n) / (n * (n * n - 1) / 12.0)
         
         # Normalize to -1 to 1
         return np.tanh(slope * 10)
     
-    def _calculate_volatility(self, data: Dict, historical: Optional[List[Dict]]) -> float:
+    def _calculate_volatility(self, values: np.ndarray) -> float:
         """Calculate volatility (0 to 1)"""
-        if not historical or len(historical) < 2:
-            return 0.5
-        
-        values = [h.get('value', h.get('probability', 0.5)) for h in historical[-20:]]
         if len(values) < 2:
             return 0.5
         
-        std = np.std(values)
+        deviations = values - values.sum() / len(values)
+        std = np.sqrt(np.dot(deviations, deviations) / len(values))
         # Normalize to 0-1
         return min(1.0, std * 2)
     
-    def _calculate_momentum(self, data: Dict, historical: Optional[List[Dict]]) -> float:
+    def _calculate_momentum(self, values: np.ndarray) -> float:
         """Calculate momentum (-1 to 1)"""
-        if not historical or len(historical) < 3:
+        if len(values) < 3:
             return 0.0
         
-        recent = [h.get('value', h.get('probability', 0.5)) for h in historical[-5:]]
-        older = [h.get('value', h.get('probability', 0.5)) for h in historical[-10:-5]]
+        recent = values[-5:]
+        older = values[-10:-5]
         
         if len(recent) == 0 or len(older) == 0:
             return 0.0
         
-        recent_avg = np.mean(recent)
-        older_avg = np.mean(older)
+        recent_avg = recent.sum() / len(recent)
+        older_avg = older.sum() / len(older)
         
         momentum = (recent_avg - older_avg) * 2
-        return np.clip(momentum, -1, 1)
+        return min(1.0, max(-1.0, momentum))
     
     def _calculate_consensus(self, data: Dict) -> float:
         """Calculate market consensus (0 to 1)"""
@@ -180,71 +325,28 @@ class UniversalFeatureExtractor:
         
         return [hour, day_of_week, day_of_month]
     
-    def _calculate_statistical_features(self, data: Dict, historical: Optional[List[Dict]]) -> List[float]:
+    def _calculate_statistical_features(self, values: np.ndarray) -> List[float]:
         """Calculate statistical features"""
-        if not historical or len(historical) < 5:
+        if len(values) < 5:
             return [0.5, 0.5, 0.5]  # Defaults
         
-        values = [h.get('value', h.get('probability', 0.5)) for h in historical[-20:]]
+        n = len(values)
         
         # Mean
-        mean = np.mean(values)
+        mean = values.sum() / n
         
         # Median
-        median = np.median(values)
+        ordered = np.sort(values)
+        median = ordered[n // 2] if n % 2 else (ordered[n // 2 - 1] + ordered[n // 2]) / 2.0
         
         # Skewness (asymmetry)
-        if len(values) > 2:
-            skew = np.mean((values - mean) ** 3) / (np.std(values) ** 3 + 1e-8)
-            skew = np.tanh(skew)  # Normalize
-        else:
-            skew = 0.0
+        deviations = values - mean
+        std = np.sqrt(np.dot(deviations, deviations) / n)
+        skew = np.dot(deviations * deviations, deviations) / n / (std ** 3 + 1e-8)
+        skew = np.tanh(skew)  # Normalize
         
         return [mean, median, skew]
 
-class DomainAdapter:
-    """
-    Small adapter model that adjusts base predictions for specific domains
-    Trains quickly with domain-specific data
-    """
-    
-    def __init__(self, domain: str):
-        self.domain = domain
-        # Small model (trains fast)
-        self.model = GradientBoostingRegressor(n_estimators=50, max_depth=3)
-        self.scaler = StandardScaler()
-        self.is_trained = False
-    
-    def train(self, base_features: np.array, labels: np.array):
-        """Train adapter with domain-specific data"""
-        if len(base_features) < 10:
-            # Not enough data, use identity mapping
-            self.is_trained = False
-            return
-        
-        # Scale features
-        base_features_scaled = self.scaler.fit_transform(base_features)
-        
-        # Train
-        self.model.fit(base_features_scaled, labels)
-        self.is_trained = True
-    
-    def adjust(self, base_prediction: float, base_features: np.array) -> float:
-        """Adjust base prediction for this domain"""
-        if not self.is_trained:
-            return base_prediction
-        
-        # Scale features
-        features_scaled = self.scaler.transform([base_features])[0]
-        
-        # Predict adjustment
-        adjustment = self.model.predict([features_scaled])[0]
-        
-        # Combine: base + adjustment
-        adjusted = base_prediction * 0.7 + adjustment * 0.3
-        
-        return np.clip(adjusted, 0.0, 1.0)
-
 class UniversalPredictor:
     """
     Universal prediction model that works across multiple domains
@@ -253,7 +355,19 @@ class UniversalPredictor:
     
     def __init__(self):
         self.feature_extractor = UniversalFeatureExtractor()
+        # Adapters in memory; saved versions are loaded from the store on first use
         self.domain_adapters: Dict[str, DomainAdapter] = {}
+        self.adapter_store = AdapterStore()
+        self._adapter_lock = threading.Lock()
+        # Bumped whenever a freshly fitted adapter is swapped in; a refit started
+        # before that is stale. Incremental updates keep the generation.
+        self._adapter_generation: Dict[str, int] = {}
+        # Trained adapters are saved once every this many incremental updates (and on every fit)
+        self.save_every_updates = 25
+        # Training runs as background jobs in resource-limited worker processes
+        self.jobs = AdapterJobManager()
+        # Running history state per eventId, fed through append()
+        self.streams = EventStreamRegistry()
         self.base_models = self._initialize_base_models()
         self.model_version = "1.0.0"
     
@@ -280,16 +394,80 @@ class UniversalPredictor:
     ) -> UniversalPredictionResponse:
         """
         Universal prediction that works in any domain
+        Without `historical`, an event with appended stream state is scored from it
         """
         # 1. Extract universal features
-        universal_features = self.feature_extractor.extract(features, historical)
+        stream = self.streams.get(eventId) if historical is None else None
+        if stream is not None:
+            universal_features = self.feature_extractor.extract_from_stream(features, stream)
+            history_length = stream.count
+        else:
+            universal_features = self.feature_extractor.extract(features, historical)
+            history_length = len(historical) if historical else 0
+        return self._respond(domain, eventId, universal_features, history_length)
+    
+    def append(self, domain: DomainType, eventId: str, points: List[Dict], features: Dict) -> UniversalPredictionResponse:
+        """
+        Append new history points to an event's running state and predict from it
+        """
+        values = [p.get('value', p.get('probability', 0.5)) for p in points]
+        stream = self.streams.append(eventId, values)
+        universal_features = self.feature_extractor.extract_from_stream(features, stream)
+        return self._respond(domain, eventId, universal_features, stream.count)
+    
+    def predict_batch(self, requests: List[UniversalPredictionRequest]) -> List[UniversalPredictionResponse]:
+        """
+        predict() for many events: features are extracted into one matrix and the base
+        ensemble and each domain's adapter run once on that domain's rows
+        Responses are in request order
+        """
+        n = len(requests)
+        universal_features = np.empty((n, len(UNIVERSAL_FEATURE_NAMES)))
+        history_lengths = np.zeros(n, dtype=np.int64)
+        
+        # 1. Extract universal features (appended stream state as in predict())
+        batch_rows = []
+        for i, request in enumerate(requests):
+            stream = self.streams.get(request.eventId) if request.historicalData is None else None
+            if stream is not None:
+                universal_features[i] = self.feature_extractor.extract_from_stream(request.features, stream)
+                history_lengths[i] = stream.count
+            else:
+                batch_rows.append(i)
+                history_lengths[i] = len(request.historicalData) if request.historicalData else 0
+        if batch_rows:
+            universal_features[batch_rows] = self.feature_extractor.extract_batch(
+                [requests[i].features for i in batch_rows],
+                [requests[i].historicalData for i in batch_rows]
+            )
+        
+        # 2-3. Base prediction and domain adapter, once per domain
+        predictions = np.empty(n)
+        rows_by_domain: Dict[str, List[int]] = {}
+        for i, request in enumerate(requests):
+            rows_by_domain.setdefault(request.domain, []).append(i)
+        for domain, rows in rows_by_domain.items():
+            domain_features = universal_features[rows]
+            base_predictions = self._predict_base(domain_features)
+            adapter = self.get_adapter(domain)
+            if adapter is not None and adapter.is_trained:
+                predictions[rows] = adapter.adjust_batch(base_predictions, domain_features)
+            else:
+                predictions[rows] = base_predictions
         
+        return [
+            self._build_response(request.domain, request.eventId, universal_features[i], predictions[i], int(history_lengths[i]))
+            for i, request in enumerate(requests)
+        ]
+    
+    def _respond(self, domain: str, eventId: str, universal_features: np.array, history_length: int) -> UniversalPredictionResponse:
+        """Adapter, confidence and response for extracted universal features"""
         # 2. Base prediction (ensemble of models)
         base_prediction = self._predict_base(universal_features)
         
         # 3. Apply domain adapter if available
-        if domain in self.domain_adapters:
-            adapter = self.domain_adapters[domain]
+        adapter = self.get_adapter(domain)
+        if adapter is not None:
             if adapter.is_trained:
                 adjusted_prediction = adapter.adjust(base_prediction, universal_features)
             else:
@@ -297,8 +475,17 @@ class UniversalPredictor:
         else:
             adjusted_prediction = base_prediction
         
+        return self._build_response(domain, eventId, universal_features, adjusted_prediction, history_length)
+    
+    def _build_response(self,
+                        domain: str,
+                        eventId: str,
+                        universal_features: np.array,
+                        adjusted_prediction: float,
+                        history_length: int) -> UniversalPredictionResponse:
+        """Confidence, interval and factors around an adjusted prediction"""
         # 4. Calculate confidence
-        confidence = self._calculate_confidence(universal_features, historical)
+        confidence = self._calculate_confidence(universal_features, history_length)
         
         # 5. Confidence interval
         std = 0.1  # Would be calculated from model uncertainty
@@ -321,27 +508,28 @@ class UniversalPredictor:
         )
     
     def _predict_base(self, features: np.array) -> float:
-        """Base prediction from ensemble"""
+        """Base prediction from ensemble (one row, or an array per row of a feature matrix)"""
+        features = np.asarray(features)
         # Simple ensemble: average of different approaches
         predictions = []
         
         # Trend-based prediction
-        trend_pred = 0.5 + features[0] * 0.2  # Trend feature
+        trend_pred = 0.5 + features[..., 0] * 0.2  # Trend feature
         predictions.append(trend_pred)
         
         # Consensus-based prediction
-        consensus_pred = 0.5 + (features[3] - 0.5) * 0.3  # Consensus feature
+        consensus_pred = 0.5 + (features[..., 3] - 0.5) * 0.3  # Consensus feature
         predictions.append(consensus_pred)
         
         # Momentum-based prediction
-        momentum_pred = 0.5 + features[2] * 0.2  # Momentum feature
+        momentum_pred = 0.5 + features[..., 2] * 0.2  # Momentum feature
         predictions.append(momentum_pred)
         
         # Average
-        base_pred = np.mean(predictions)
+        base_pred = np.mean(predictions, axis=0)
         return np.clip(base_pred, 0.0, 1.0)
     
-    def _calculate_confidence(self, features: np.array, historical: Optional[List[Dict]]) -> float:
+    def _calculate_confidence(self, features: np.array, history_length: int) -> float:
         """Calculate prediction confidence"""
         # Higher confidence if:
         # - High consensus (low volatility)
@@ -359,7 +547,7 @@ class UniversalPredictor:
             confidence += 0.1
         
         # Boost if we have historical data
-        if historical and len(historical) > 10:
+        if history_length > 10:
             confidence += 0.1
         
         return np.clip(confidence, 0.5, 0.95)
@@ -374,22 +562,146 @@ class UniversalPredictor:
             "volume": float(features[4]),
         }
     
-    def add_domain_adapter(self, domain: str, training_data: List[Dict]):
-        """Add or update domain adapter"""
-        adapter = DomainAdapter(domain)
+    def _training_matrix(self, training_data: List[Dict]):
+        """Universal features and labels of /adapt training rows"""
+        base_features = self.feature_extractor.extract_batch(
+            training_data, [data.get('historical', []) for data in training_data]
+        )
+        labels = np.array([data.get('outcome', data.get('probability', 0.5)) for data in training_data])
+        return base_features, labels
+    
+    def add_domain_adapter(self, domain: str, training_data: List[Dict], incremental: bool = False):
+        """Add or update domain adapter (in the calling thread; /adapt uses submit_domain_adapter)"""
+        adapter = DomainAdapter(domain, incremental=incremental)
         
         # Extract features and labels
-        base_features = []
-        labels = []
-        
-        for data in training_data:
-            features = self.feature_extractor.extract(data, data.get('historical', []))
-            base_features.append(features)
-            labels.append(data.get('outcome', data.get('probability', 0.5)))
+        base_features, labels = self._training_matrix(training_data)
         
         if len(base_features) > 0:
-            adapter.train(np.array(base_features), np.array(labels))
+            adapter.train(base_features, labels)
+            self._install_adapter(domain, adapter, len(training_data))
+        return adapter.version
+    
+    def submit_domain_adapter(self, domain: str, training_data: List[Dict], incremental: bool = False) -> AdapterJob:
+        """Train a domain adapter as a background job; poll self.jobs for its status"""
+        self.adapter_store.version_dir(domain, 1)  # Raises ValueError for names the store rejects
+        
+        def prepare():
+            if not training_data:
+                raise ValueError("No training data")
+            return self._training_matrix(training_data)
+        
+        def finish(adapter: DomainAdapter, training_samples: int) -> int:
+            return self._install_adapter(domain, adapter, training_samples)
+        
+        return self.jobs.submit(domain, prepare, finish, options={'incremental': incremental})
+    
+    def _install_adapter(self, domain: str, adapter: DomainAdapter, training_samples: int) -> int:
+        """Save a trained adapter as the domain's next version and swap it in"""
+        with self._adapter_lock:
+            adapter.version = self.adapter_store.save(domain, adapter, training_samples=training_samples)
             self.domain_adapters[domain] = adapter
+            self._adapter_generation[domain] = self._adapter_generation.get(domain, 0) + 1
+        return adapter.version
+    
+    def update_domain_adapter(self, domain: str, training_data: List[Dict]) -> Dict:
+        """
+        Fold new labeled outcomes into a domain's adapter (creating an incremental one
+        if the domain has none) and start a background full refit when it is due
+        Until the adapter is trained, rows are only kept and its first fit runs as a job
+        """
+        if not training_data:
+            raise ValueError("No training data")
+        self.adapter_store.version_dir(domain, 1)  # Raises ValueError for names the store rejects
+        base_features, labels = self._training_matrix(training_data)
+        loaded = self.get_adapter(domain)
+        with self._adapter_lock:
+            current = self.domain_adapters.get(domain) or loaded
+            # Readers use the published adapter without the lock: update a copy and swap it in
+            adapter = copy.deepcopy(current) if current is not None else DomainAdapter(domain, incremental=True)
+            if adapter.is_trained:
+                adapter.update(base_features, labels)
+                # Throttled, so a burst of small updates doesn't rotate the last fit out of the store
+                if adapter.updates_since_refit % self.save_every_updates == 0:
+                    adapter.version = self.adapter_store.save(domain, adapter, training_samples=adapter.rows_seen)
+            else:
+                adapter.remember(base_features, labels)
+            self.domain_adapters[domain] = adapter
+            fit_due = adapter.needs_refit() if adapter.is_trained else len(adapter.history_labels) >= 10
+        
+        refit_job = self._start_refit(domain) if fit_due else None
+        return {
+            "version": adapter.version,
+            "trained": adapter.is_trained,
+            "refitStarted": refit_job is not None,
+            "refitJobId": refit_job.id if refit_job is not None else None,
+        }
+    
+    def _start_refit(self, domain: str) -> Optional[AdapterJob]:
+        """Fit a fresh adapter on the kept history as a background job (first fit or refit, one per domain)"""
+        with self._adapter_lock:
+            if self.jobs.active_job(domain, kind='refit') is not None:
+                return None
+            adapter = self.domain_adapters[domain]
+            generation = self._adapter_generation.get(domain, 0)
+            rows_seen, features, labels = adapter.rows_seen, adapter.history_features, adapter.history_labels
+        
+        def finish(refitted: DomainAdapter, training_samples: int) -> Optional[int]:
+            refitted.rows_seen = rows_seen
+            with self._adapter_lock:
+                if self._adapter_generation.get(domain, 0) != generation:
+                    return None  # Replaced by a new /adapt meanwhile
+                # Rows that arrived while refitting
+                current = self.domain_adapters[domain]
+                features, labels = current.recent_history(current.rows_seen - rows_seen)
+                if len(labels):
+                    refitted.update(features, labels)
+                refitted.version = self.adapter_store.save(domain, refitted, training_samples=refitted.rows_seen)
+                self.domain_adapters[domain] = refitted
+                self._adapter_generation[domain] = generation + 1
+                return refitted.version
+        
+        options = {
+            'incremental': adapter.incremental,
+            'stages_per_update': adapter.stages_per_update,
+            'update_window': adapter.update_window,
+            'max_history': adapter.max_history,
+        }
+        return self.jobs.submit(domain, lambda: (features, labels), finish, options=options, kind='refit')
+    
+    def get_adapter(self, domain: str) -> Optional[DomainAdapter]:
+        """Adapter for a domain, loaded from the adapter store on first use"""
+        adapter = self.domain_adapters.get(domain)
+        if adapter is not None:
+            return adapter
+        with self._adapter_lock:
+            adapter = self.domain_adapters.get(domain)
+            if adapter is None:
+                version = self.adapter_store.latest_version(domain)
+                adapter = self.adapter_store.load(domain, version) if version is not None else None
+                if adapter is None:
+                    return None
+                adapter.version = version
+                self.domain_adapters[domain] = adapter
+            return adapter
+    
+    def known_domains(self) -> List[str]:
+        """Domains with an adapter in memory or in the store"""
+        return sorted(set(self.domain_adapters) | set(self.adapter_store.domains()))
+    
+    def adapter_info(self, domain: str) -> Dict:
+        """Load state, version and artifact size of a domain's adapter"""
+        adapter = self.domain_adapters.get(domain)
+        meta = self.adapter_store.metadata(domain, adapter.version if adapter is not None else None) or {}
+        return {
+            "loaded": adapter is not None,
+            "trained": adapter.is_trained if adapter is not None else None,
+            "version": adapter.version if adapter is not None else meta.get('version'),
+            "latestVersion": self.adapter_store.latest_version(domain),
+            "sizeBytes": meta.get('size_bytes'),
+            "trainingSamples": meta.get('training_samples'),
+            "createdAt": meta.get('created_at'),
+        }
 
 predictor = UniversalPredictor()
 
@@ -405,25 +717,91 @@ async def predict_universal(request: UniversalPredictionRequest):
         historical=request.historicalData
     )
 
-@router.post("/adapt/{domain}")
-async def adapt_to_domain(domain: str, training_data: List[Dict]):
+@router.post("/predict-batch", response_model=List[UniversalPredictionResponse])
+async def predict_universal_batch(requests: List[UniversalPredictionRequest]):
+    """
+    Universal predictions for many events in one call, in request order
+    """
+    return predictor.predict_batch(requests)
+
+@router.post("/append", response_model=UniversalPredictionResponse)
+async def append_universal(request: UniversalAppendRequest):
+    """
+    Append new history points for an event and predict from its running state
+    Later /predict calls without historicalData reuse the same state
+    """
+    return predictor.append(
+        domain=request.domain,
+        eventId=request.eventId,
+        points=request.points,
+        features=request.features
+    )
+
+@router.post("/adapt/{domain}", status_code=202)
+async def adapt_to_domain(domain: str, training_data: List[Dict], incremental: bool = False):
     """
     Adapt model to new domain with training data
+    Training runs as a background job; poll GET /jobs/{jobId} for progress and the new version
+    With `incremental`, the adapter also keeps an online (partial_fit) learner
     """
-    predictor.add_domain_adapter(domain, training_data)
+    try:
+        job = predictor.submit_domain_adapter(domain, training_data, incremental=incremental)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
-        "message": f"Domain adapter for {domain} trained successfully",
+        "message": f"Domain adapter training for {domain} started",
         "domain": domain,
+        "jobId": job.id,
+        "status": job.status,
         "training_samples": len(training_data)
     }
 
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status, progress and resulting adapter version of a training job
+    """
+    job = predictor.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job.to_dict()
+
+@router.get("/jobs")
+async def list_jobs(domain: Optional[str] = None):
+    """
+    Recent training jobs, newest first
+    """
+    return {
+        "jobs": [job.to_dict() for job in predictor.jobs.list_jobs(domain)],
+        "stats": predictor.jobs.stats()
+    }
+
+@router.post("/adapt/{domain}/update")
+def update_domain_adapter(domain: str, training_data: List[Dict]):
+    """
+    Fold new labeled outcomes into the domain adapter without retraining from scratch
+    A plain def, so FastAPI runs the (bounded) update in its threadpool, off the event loop
+    """
+    try:
+        result = predictor.update_domain_adapter(domain, training_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "message": f"Domain adapter for {domain} updated",
+        "domain": domain,
+        "new_samples": len(training_data),
+        **result
+    }
+
 @router.get("/domains")
 async def get_domains():
     """
     Get list of supported domains
     """
+    domains = predictor.known_domains()
     return {
-        "supported_domains": list(predictor.domain_adapters.keys()),
+        "supported_domains": domains,
+        "adapters": {domain: predictor.adapter_info(domain) for domain in domains},
         "base_domains": ["sports", "finance", "crypto", "politics", "generic"]
     }
 
@@ -436,7 +814,9 @@ async def get_model_info():
         "version": predictor.model_version,
         "type": "Universal Meta-Learning",
         "architecture": "Ensemble + Domain Adapters",
-        "domains": list(predictor.domain_adapters.keys()),
+        "domains": predictor.known_domains(),
+        "streams": predictor.streams.stats(),
+        "jobs": predictor.jobs.stats(),
         "features": [
             "trend",
             "volatility",
@@ -0,0 +1,231 @@
+"""
+Universal Streams
+Per-event rolling state for the universal history features, so clients polling a
+market can append only new points instead of resending the whole history.
+
+EventStream keeps the last 20 values in a float32 ring buffer together with
+running sums over the windows UniversalFeatureExtractor reads (last 5, 10 and 20
+values) and the position-weighted sum the trend slope needs. Appending a point
+and reading trend, momentum and mean are O(1) however long the stream gets. The
+std, skew and median are computed from the fixed 20-value buffer, like extract()
+does: central moments from raw sums of squares and cubes lose all precision on
+price-scale values (e.g. 30000 + small moves). Values are stored as float32, so
+features match extract() on the same float32 history to about 1e-6. Running sums
+are rebuilt from the buffer every time it wraps, which keeps rounding drift from
+accumulating.
+
+EventStreamRegistry holds one stream per event id with LRU eviction of idle events.
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+import math
+import threading
+import time
+import numpy as np
+
+# Windows of the universal history features (see UniversalFeatureExtractor)
+MOMENTUM_WINDOW = 5
+TREND_WINDOW = 10
+STATS_WINDOW = 20
+
+class EventStream:
+    """
+    Ring buffer of the last STATS_WINDOW values with O(1) windowed statistics
+    """
+    
+    def __init__(self):
+        self.buffer = np.zeros(STATS_WINDOW, dtype=np.float32)
+        self.count = 0  # Values appended over the stream's lifetime
+        self.last_seen = time.monotonic()
+        self._reset_sums()
+    
+    def _reset_sums(self):
+        self.sum_5 = 0.0
+        self.sum_10 = 0.0
+        self.weighted_sum_10 = 0.0  # sum(position * value) over the trend window
+        self.sum_20 = 0.0
+    
+    def __len__(self) -> int:
+        """Values currently in the window"""
+        return min(self.count, STATS_WINDOW)
+    
+    def _ago(self, steps: int) -> float:
+        """Value appended `steps` appends before the newest (0 = newest)"""
+        return float(self.buffer[(self.count - 1 - steps) % STATS_WINDOW])
+    
+    def append(self, value: float):
+        value = float(np.float32(value))
+        count = self.count
+        
+        # Values leaving each window
+        leaving_5 = self._ago(MOMENTUM_WINDOW - 1) if count >= MOMENTUM_WINDOW else 0.0
+        leaving_10 = self._ago(TREND_WINDOW - 1) if count >= TREND_WINDOW else 0.0
+        leaving_20 = self._ago(STATS_WINDOW - 1) if count >= STATS_WINDOW else 0.0
+        
+        # Positions in the trend window shift down by one once it is full
+        if count >= TREND_WINDOW:
+            self.weighted_sum_10 += (TREND_WINDOW - 1) * value - (self.sum_10 - leaving_10)
+        else:
+            self.weighted_sum_10 += count * value
+        self.sum_5 += value - leaving_5
+        self.sum_10 += value - leaving_10
+        self.sum_20 += value - leaving_20
+        
+        self.buffer[count % STATS_WINDOW] = value
+        self.count = count + 1
+        self.last_seen = time.monotonic()
+        if self.count % STATS_WINDOW == 0:
+            self._resync()
+    
+    def extend(self, values: Iterable[float]):
+        for value in values:
+            self.append(value)
+    
+    def window(self) -> np.ndarray:
+        """Values in the window, oldest first (float64)"""
+        n = len(self)
+        start = (self.count - n) % STATS_WINDOW
+        return np.roll(self.buffer, -start)[:n].astype(np.float64)
+    
+    def _resync(self):
+        """Recompute the running sums from the buffer"""
+        values = self.window()
+        self._reset_sums()
+        trend = values[-TREND_WINDOW:]
+        self.sum_5 = float(values[-MOMENTUM_WINDOW:].sum())
+        self.sum_10 = float(trend.sum())
+        self.weighted_sum_10 = float(np.dot(np.arange(len(trend)), trend))
+        self.sum_20 = float(values.sum())
+    
+    @property
+    def trend(self) -> float:
+        """Trend direction (-1 to 1): tanh(10 * least-squares slope of the last 10 values)"""
+        if self.count < 2:
+            return 0.0
+        n = min(self.count, TREND_WINDOW)
+        slope = (self.weighted_sum_10 - (n - 1) / 2.0 * self.sum_10) / (n * (n * n - 1) / 12.0)
+        return math.tanh(slope * 10)
+    
+    @property
+    def mean(self) -> float:
+        n = len(self)
+        return self.sum_20 / n if n else 0.0
+    
+    def _deviations(self) -> np.ndarray:
+        """Window values minus their mean (central moments from raw sums cancel catastrophically)"""
+        values = self.window()
+        return values - values.sum() / len(values)
+    
+    @property
+    def std(self) -> float:
+        """Population std of the last 20 values"""
+        n = len(self)
+        if n == 0:
+            return 0.0
+        deviations = self._deviations()
+        return math.sqrt(np.dot(deviations, deviations) / n)
+    
+    @property
+    def volatility(self) -> float:
+        """Volatility (0 to 1)"""
+        if self.count < 2:
+            return 0.5
+        return min(1.0, self.std * 2)
+    
+    @property
+    def momentum(self) -> float:
+        """Mean of the last 5 values minus the mean of the 5 before, times 2 (-1 to 1)"""
+        older_count = min(max(self.count - MOMENTUM_WINDOW, 0), TREND_WINDOW - MOMENTUM_WINDOW)
+        if self.count < 3 or older_count == 0:
+            return 0.0
+        recent_avg = self.sum_5 / min(self.count, MOMENTUM_WINDOW)
+        older_avg = (self.sum_10 - self.sum_5) / older_count
+        return min(1.0, max(-1.0, (recent_avg - older_avg) * 2))
+    
+    @property
+    def skew(self) -> float:
+        """tanh of the population skewness of the last 20 values"""
+        n = len(self)
+        if n == 0:
+            return 0.0
+        deviations = self._deviations()
+        std = math.sqrt(np.dot(deviations, deviations) / n)
+        return math.tanh(np.dot(deviations * deviations, deviations) / n / (std ** 3 + 1e-8))
+    
+    @property
+    def median(self) -> float:
+        return float(np.median(self.window())) if self.count else 0.5
+    
+    def statistical_features(self) -> List[float]:
+        """[mean, median, skew] as UniversalFeatureExtractor returns them"""
+        if self.count < 5:
+            return [0.5, 0.5, 0.5]
+        return [self.mean, self.median, self.skew]
+
+class EventStreamRegistry:
+    """
+    EventStream per event id, LRU-evicted by count and idle time
+    Thread-safe
+    """
+    
+    def __init__(self, max_events: int = 10000, idle_seconds: float = 6 * 3600.0):
+        self.max_events = max_events
+        self.idle_seconds = idle_seconds
+        self._streams: 'OrderedDict[str, EventStream]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._streams)
+    
+    def __contains__(self, event_id: str) -> bool:
+        return event_id in self._streams
+    
+    def get(self, event_id: str) -> Optional[EventStream]:
+        """Stream of an event (marks it as recently used), None when unknown or evicted"""
+        with self._lock:
+            self._evict_idle()
+            stream = self._streams.get(event_id)
+            if stream is not None:
+                self._streams.move_to_end(event_id)
+                stream.last_seen = time.monotonic()
+            return stream
+    
+    def append(self, event_id: str, values: Iterable[float]) -> EventStream:
+        """Append values (oldest first) to an event's stream, creating it if needed"""
+        with self._lock:
+            stream = self._streams.get(event_id)
+            if stream is None:
+                stream = self._streams[event_id] = EventStream()
+            else:
+                self._streams.move_to_end(event_id)
+            stream.extend(values)
+            stream.last_seen = time.monotonic()
+            self._evict_idle()
+            while len(self._streams) > self.max_events:
+                self._streams.popitem(last=False)
+                self.evictions += 1
+            return stream
+    
+    def discard(self, event_id: str):
+        with self._lock:
+            self._streams.pop(event_id, None)
+    
+    def _evict_idle(self):
+        """Drop streams idle for longer than idle_seconds (oldest are at the front)"""
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._streams:
+            event_id, stream = next(iter(self._streams.items()))
+            if stream.last_seen >= cutoff:
+                break
+            del self._streams[event_id]
+            self.evictions += 1
+    
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'events': len(self._streams),
+                'max_events': self.max_events,
+                'idle_seconds': self.idle_seconds,
+                'evictions': self.evictions,
+            }